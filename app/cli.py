@@ -0,0 +1,83 @@
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from app.projects.models.project import Project
+from app.tables.models.table_manager import TableManager
+
+EXPORT_TYPES = ("csv", "xlsx", "json", "pkl")
+
+
+async def refresh_project(project_dir: str, sync: bool = False, export_types: tuple = ()) -> list[str]:
+    """Syncs the data sources (optional), runs the pipeline on the full data, saves its tables and exports them; returns the export paths"""
+    project = Project.instantiate_from_dir(project_dir)
+    if sync:
+        for source in project.get_sources():
+            await source.sync()
+    table_manager = await TableManager.init_from_project_dir(project_dir, full_run=True)
+    return [table_manager.export_table(table_name, export_type)
+            for table_name in table_manager.tables for export_type in export_types]
+
+
+def _refresh_project(cwd: str, project_dir: str, sync: bool, export_types: tuple) -> dict:
+    """Executed in the workers (see PipelinePool._run_pipeline), the pipeline runs in the worker itself"""
+    if os.getcwd() != cwd:
+        os.chdir(cwd)
+    os.environ["SQUIRREL_POOL_MODE"] = "thread"
+    start_time = time.perf_counter()
+    try:
+        export_paths, error = asyncio.run(refresh_project(project_dir, sync, export_types)), None
+    except Exception as e:
+        export_paths, error = [], str(e) or e.__class__.__name__
+    return {"exports": export_paths, "error": error, "time": round(time.perf_counter() - start_time, 3)}
+
+
+def _get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app", description="Squirrel without the web interface")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run", help="Run the pipelines of projects and save their tables in data_tables/ (as the tables page would)")
+    run_parser.add_argument("projects", nargs="*", help="Directories of the projects (in _projects)")
+    run_parser.add_argument("--all", action="store_true", help="Run all the projects (directories of _projects with a manifest)")
+    run_parser.add_argument("--sync", action="store_true", help="Sync the data sources before running the pipelines")
+    run_parser.add_argument("--export", nargs="+", choices=EXPORT_TYPES, default=[], help="Export the tables in these formats")
+    run_parser.add_argument("--workers", type=int, default=1, help="Number of projects run at the same time (in separate processes)")
+    return parser
+
+
+def run_projects(project_dirs: list[str], sync: bool = False, export_types: tuple = (), workers: int = 1) -> dict:
+    """Refreshes the projects (see refresh_project), returns the export paths or the error by project"""
+    args = [(os.getcwd(), project_dir, sync, tuple(export_types)) for project_dir in project_dirs]
+    if workers <= 1:
+        return {project_args[1]: _refresh_project(*project_args) for project_args in args}
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        futures = {executor.submit(_refresh_project, *project_args): project_args[1] for project_args in args}
+        for future in as_completed(futures):
+            try:
+                results[futures[future]] = future.result()
+            except Exception as e:  # e.g. worker stopped (out of memory)
+                results[futures[future]] = {"exports": [], "error": str(e) or e.__class__.__name__, "time": None}
+    return results
+
+
+def main(argv=None) -> int:
+    args = _get_parser().parse_args(argv)
+    project_dirs = list(args.projects)
+    if args.all:
+        project_dirs += [project_dir for project_dir in Project.get_project_dirs(os.path.join(os.getcwd(), "_projects"))
+                         if project_dir not in project_dirs]
+    if not project_dirs:
+        print("No project to run (give project directories or --all)", file=sys.stderr)
+        return 2
+
+    results = run_projects(project_dirs, args.sync, args.export, args.workers)
+    for project_dir in project_dirs:
+        result = results[project_dir]
+        status = f"error: {result['error']}" if result["error"] else f"ok ({len(result['exports'])} exports)"
+        print(f"{project_dir}: {status} in {result['time']}s")
+    return 1 if any(result["error"] for result in results.values()) else 0
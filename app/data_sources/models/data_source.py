@@ -1,5 +1,8 @@
+import glob
 import json
 import os
+import threading
+import numpy as np
 import pandas as pd
 
 class DataSource:
@@ -69,11 +72,72 @@ class DataSource:
         """To be implemented by subclasses (mandatory)"""
         pass
 
-    def create_table(self):
+    def create_table(self, columns=None, preview=None):
+        """
+        columns: only keep these columns (all if None), unknown ones are ignored
+        preview: only keep a sample of the rows, see _get_preview_table
+        """
         data_file_path = os.path.join(self.path, 'data.pkl')
+        table = self._get_preview_table(**preview) if preview else pd.read_pickle(data_file_path)
+        if columns is not None:
+            table = table[[col for col in table.columns if col in columns]]
+        return table
+
+    def iter_chunks(self, chunk_rows: int, columns=None, preview=None):
+        """
+        Same table as create_table, split in chunks of chunk_rows rows (with the index of the whole table)
+          * Sources that can not be read by chunks (to be implemented by subclasses, optional) return the whole table as one chunk
+        """
+        yield self.create_table(columns=columns, preview=preview)
+
+    def _get_preview_table(self, rows: int, sampling: str = "head"):
+        """
+        First rows ('head') or deterministic random sample ('random', in the original order) of the data
+          * The sample is saved next to the data (by sampling and rows), so that preview runs do not read the whole data again
+          * The samples of a previous data are removed when the data is refreshed (see _remove_derived_files)
+        """
+        data_file_path = os.path.join(self.path, 'data.pkl')
+        preview_file_path = os.path.join(self.path, f'preview_{sampling}_{rows}.pkl')
+        if os.path.exists(preview_file_path) and os.path.getmtime(preview_file_path) >= os.path.getmtime(data_file_path):
+            return pd.read_pickle(preview_file_path)
+
         table = pd.read_pickle(data_file_path)
+        if sampling == "random" and rows < len(table.index):
+            positions = np.random.default_rng(0).choice(len(table.index), size=rows, replace=False)
+            table = table.iloc[np.sort(positions)]
+        else:
+            table = table.head(rows)
+        self._save_derived_file(table, preview_file_path)
         return table
 
+    def _get_schema(self) -> pd.DataFrame:
+        """Empty table with the columns and dtypes of the data, saved next to it so that the data is not read each time"""
+        data_file_path = os.path.join(self.path, 'data.pkl')
+        schema_file_path = os.path.join(self.path, 'schema.pkl')
+        if os.path.exists(schema_file_path) and os.path.getmtime(schema_file_path) >= os.path.getmtime(data_file_path):
+            return pd.read_pickle(schema_file_path)
+        schema = pd.read_pickle(data_file_path).iloc[:0]
+        self._save_derived_file(schema, schema_file_path)
+        return schema
+
+    @staticmethod
+    def _save_derived_file(table: pd.DataFrame, file_path: str):
+        """Written then renamed, so that a concurrent run never reads a partial file"""
+        tmp_file_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        table.to_pickle(tmp_file_path)
+        os.replace(tmp_file_path, file_path)
+
+    def _remove_derived_files(self):
+        """Previews and schema of the previous data, to be called when the data file is (re)created"""
+        for file_path in glob.glob(os.path.join(self.path, 'preview_*.pkl')) + [os.path.join(self.path, 'schema.pkl')]:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+    def get_data_version(self):
+        """Changes each time the data file is (re)created, e.g. on sync"""
+        data_file_stat = os.stat(os.path.join(self.path, 'data.pkl'))
+        return f"{data_file_stat.st_mtime_ns}-{data_file_stat.st_size}"
+
     async def sync(self):
         """To be implemented by subclasses (optional)"""
         pass
@@ -26,6 +26,7 @@ class DataSourceAPI(DataSource):
         data = await self._get_data_from_api()
         data_file_path = os.path.join(self.path, 'data.pkl')
         data.to_pickle(data_file_path)
+        self._remove_derived_files()
         self._update_last_sync()
 
     def _update_last_sync(self):
@@ -64,6 +64,7 @@ class DataSourceFile(DataSource):
             with open(source_file_path, 'wb') as file:
                 file.write(source_file_content)
         self._create_pickle_file(source_file_path)
+        self._remove_derived_files()
 
     async def _update_source_settings(self, source, updated_data):
         """Update the source's values with the updated data, replace the file if it's not empty"""
@@ -86,6 +87,25 @@ class DataSourceCSV(DataSourceFile):
         pickle_file_path = source_file_path.replace(f'.{self.short_name}', '.pkl')
         data.to_pickle(pickle_file_path)
 
+    def iter_chunks(self, chunk_rows, columns=None, preview=None):
+        """
+        The original csv file is read by chunks, so that the whole data never has to fit in memory
+          * The chunks are cast to the dtypes of the whole data (e.g. a string column is float in a chunk of NaN only)
+        """
+        source_file_path = os.path.join(self.path, 'data.csv')
+        if preview or not os.path.exists(source_file_path) or "chunksize" in self.kwargs or "iterator" in self.kwargs:
+            yield from super().iter_chunks(chunk_rows, columns, preview)
+            return
+        kwargs = dict(self.kwargs)
+        if columns is not None and "usecols" not in kwargs:
+            kwargs["usecols"] = lambda col: col in columns
+        dtypes = self._get_schema().dtypes
+        with pd.read_csv(source_file_path, chunksize=chunk_rows, **kwargs) as reader:
+            for chunk in reader:
+                if columns is not None:
+                    chunk = chunk[[col for col in chunk.columns if col in columns]]
+                yield chunk.astype({col: dtypes[col] for col in chunk.columns if col in dtypes and chunk[col].dtype != dtypes[col]})
+
 @data_source_type
 class DataSourcePickle(DataSourceFile):
     short_name = "pkl"
@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+
+from app.pipelines.models.pipeline_memory import PipelineMemory
+
+
+class ActionCache:
+    """
+    On disk cache of the tables written by each action (LRU, bounded in size)
+      * An entry is keyed by the action signature and the versions of the tables it reads,
+        a table version being the key of the action which produced it (so the key depends on the whole lineage)
+      * The index is saved once per run (see save), the entries missing from the index on disk are not reused
+      * Disabled (nothing is written) with a max size of 0, the default of the project settings (action_cache_mb)
+    """
+    def __init__(self, project_dir: str, max_size_mb: float = 1024):
+        self.path = os.path.join(os.getcwd(), "_projects", project_dir, "action_cache")
+        self.index_path = os.path.join(self.path, "index.json")
+        self.max_size = max_size_mb * 1024 * 1024
+        self.index = self._read_index()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_keys(actions) -> list[str]:
+        keys = []
+        table_versions, barrier = {}, ""
+        for pipeline_action in actions:
+            action = pipeline_action.action
+            input_tables = action.get_input_tables()
+            if input_tables is None:
+                inputs = [("*", barrier)] + sorted(table_versions.items())
+            else:
+                inputs = [(name, table_versions.get(name, barrier)) for name in sorted(input_tables)]
+            key = hashlib.sha256(repr((action.get_signature(), inputs)).encode()).hexdigest()
+
+            output_tables = action.get_output_tables()
+            if output_tables is None:
+                table_versions, barrier = {}, key
+            else:
+                table_versions.update({name: key for name in output_tables})
+            keys.append(key)
+        return keys
+
+    def _read_index(self) -> dict:
+        try:
+            with open(self.index_path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"entries": {}, "hits": 0, "misses": 0}
+
+    def save(self):
+        if not self.max_size:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        tmp_index_path = f"{self.index_path}.{threading.get_ident()}.tmp"
+        with self._lock:
+            with open(tmp_index_path, 'w') as f:
+                json.dump(self.index, f)
+        os.replace(tmp_index_path, self.index_path)
+
+    def _get_entry_path(self, key: str) -> str:
+        return os.path.join(self.path, f"{key}.pkl")
+
+    def get(self, key: str, count: bool = True):
+        """Returns the cached tables (dict), None if the key is not in the cache"""
+        entry = self.index["entries"].get(key)
+        tables = None
+        if entry:
+            try:
+                with open(self._get_entry_path(key), 'rb') as f:
+                    tables = pickle.load(f)
+                entry["last_used"] = time.time()
+            except FileNotFoundError:
+                with self._lock:
+                    self.index["entries"].pop(key, None)
+
+        if count:
+            with self._lock:
+                self.index["hits" if tables is not None else "misses"] += 1
+        return tables
+
+    def set(self, key: str, tables: dict):
+        """Caches the tables, unless they are larger than the cache (estimated from their memory usage before pickling them)"""
+        if not self.max_size or sum(PipelineMemory.get_size(table) for table in tables.values()) > self.max_size:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        entry_path = self._get_entry_path(key)
+        with open(entry_path, 'wb') as f:
+            pickle.dump(tables, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        size = os.path.getsize(entry_path)
+        if size > self.max_size:
+            os.remove(entry_path)
+            return
+        with self._lock:
+            self.index["entries"][key] = {"size": size, "last_used": time.time()}
+            self._evict()
+
+    def _evict(self):
+        entries = self.index["entries"]
+        total_size = sum(entry["size"] for entry in entries.values())
+        for key in sorted(entries, key=lambda k: entries[k]["last_used"]):
+            if total_size <= self.max_size:
+                break
+            total_size -= entries.pop(key)["size"]
+            try:
+                os.remove(self._get_entry_path(key))
+            except FileNotFoundError:
+                pass
+
+    def get_stats(self) -> dict:
+        return {
+            "hits": self.index["hits"],
+            "misses": self.index["misses"],
+            "entries": len(self.index["entries"]),
+            "size": sum(entry["size"] for entry in self.index["entries"].values()),
+        }
@@ -1,8 +1,17 @@
 import ast
+import re
+import tokenize
 import numpy as np
 import pandas as pd
 
 from app.data_sources.models.data_source_factory import DataSourceFactory
+from app.pipelines.models.expression_engine import (
+    compile_sq_action, convert_sq_action_to_python, evaluate_domain, evaluate_expression,
+    get_domain_columns, get_expression_columns, is_row_wise_domain, is_row_wise_expression
+)
+from app.pipelines.models import polars_backend
+from app.pipelines.models.dtype_compaction import compact_table
+from app.pipelines.models.polars_backend import POLARS_AVAILABLE, UnsupportedOperation
 from app.tables.models.table_manager import TableManager
 from app.projects.models.project import Project
 
@@ -11,18 +20,21 @@ def table_action_type(cls):
     TABLE_ACTION_REGISTRY[cls.__name__] = cls
     return cls
 
-def convert_sq_action_to_python(code, actual_table_name=None):
-    """
-    t[t_name] means 'table with name t_name' and is accessed by tables[t_name]
-    t[t_name]c[name] means 'column with name name in table t_name' and is accessed by tables[t_name][name]
-    c[name] means 'column with name name in actual_table' and is accessed by tables[actual_table_name][name]
-    """
-    code = code.replace(']c[', f'][') # if a table is provided
-    code = code.replace('c[', f"tables['{actual_table_name}'][") # if a table is not provided
-    code = code.replace('t[', 'tables[')
-    return code
+def get_python_code_tables(code):
+    """Returns the names of the tables used in (converted) code, None if tables are not all accessed by their name"""
+    table_names = re.findall(r"tables\[\s*(['\"])(.*?)\1\s*\]", code)
+    if len(table_names) != len(re.findall(r"\btables\b", code)):
+        return None
+    return {name for _, name in table_names}
 
 class Action:
+    engine = None  # Engine used by the last execution, see expression_engine and polars_backend
+    backend = "pandas"  # Set by the pipeline from the project settings
+    preview = None  # Set by the pipeline for preview runs, see Project.get_preview
+    compact = False  # Set by the pipeline from the project settings, the created tables are compacted (see dtype_compaction)
+    compaction = None  # Bytes saved by column by the compaction of the last execution
+    drops_other_columns = False  # True if the table only keeps the columns used by the action (e.g. GroupBy)
+
     def __init__(self, form_data):
         self.form_data = dict(form_data)
         self.args = {}
@@ -31,6 +43,10 @@ class Action:
     def get_name(self):
         return False
 
+    def get_signature(self):
+        """Identifies the action and its parameters (used to know if a previous result can be reused)"""
+        return repr((self.__class__.__name__, sorted(self.form_data.items())))
+
     async def _get(self, args_list):
         result = []
         for arg in args_list:
@@ -46,6 +62,64 @@ class Action:
             field_value = convert_sq_action_to_python(field_value, actual_table_name=table_name)
         return field_value
     
+    def get_input_tables(self):
+        """Names of the tables read by the action, None if any table can be read"""
+        table_name = self.form_data.get('table_name')
+        input_tables = {table_name} if table_name else set()
+        for field_name, field in self.args.items():
+            code = self.form_data.get(field_name)
+            if field.get('type') not in ('sq_action', 'textarea') or not code:
+                continue
+            if field.get('type') == 'sq_action':
+                try:
+                    code = convert_sq_action_to_python(code, table_name)
+                except (SyntaxError, tokenize.TokenError):
+                    return None
+            code_tables = get_python_code_tables(code)
+            if code_tables is None:
+                return None
+            input_tables |= code_tables
+        return input_tables
+
+    def get_output_tables(self):
+        """Names of the tables written by the action, None if any table can be written"""
+        return {self.form_data.get('table_name')}
+
+    def get_used_columns(self):
+        """Columns of the table (table_name) read by the action, None if unknown or if all of them are needed"""
+        return None
+
+    def get_written_columns(self):
+        """Columns of the table (table_name) written or removed by the action, None if it can also change the rows or other columns"""
+        return None
+
+    def is_row_filter(self):
+        """True if the action only keeps the rows matching a row by row condition (see get_mask), it can then be fused with other filters"""
+        return False
+
+    def is_row_local(self):
+        """True if each row of the result only depends on the same row of the table, the action can then be executed chunk by chunk (see StreamTable)"""
+        return self.is_row_filter()
+
+    async def get_mask(self, table):
+        raise NotImplementedError("Row filters must implement this method")
+
+    async def _filter_rows(self, tables):
+        table_name = self.form_data.get('table_name')
+        tables[table_name] = tables[table_name][await self.get_mask(tables[table_name])]
+        return tables
+
+    def _execute_with_backend(self, polars_operation, pandas_operation):
+        """Result of polars_operation if the polars backend is selected (and supports the operation), else of pandas_operation"""
+        if self.backend == "polars" and POLARS_AVAILABLE:
+            try:
+                result = polars_operation()
+                self.engine = "polars"
+                return result
+            except UnsupportedOperation:
+                pass
+        return pandas_operation()
+
     async def execute(self, tables):
         raise NotImplementedError("Subclasses must implement this method")
     
@@ -65,9 +139,18 @@ class AddColumn(Action):
     def get_name(self):
         return f"Add column '{self.form_data.get('col_name', '?')}' in table '{self.form_data.get('table_name', '?')}'"
 
+    def get_used_columns(self):
+        return get_expression_columns(self.form_data.get('col_value', ''), self.form_data.get('table_name'))
+
+    def is_row_local(self):
+        return is_row_wise_expression(self.form_data.get('col_value', ''), self.form_data.get('table_name'))
+
+    def get_written_columns(self):
+        return {self.form_data.get('col_name')}
+
     async def execute(self, tables):
-        table_name, col_name, col_value = await self._get(["table_name", "col_name", "col_value"])
-        exec(f"tables['{table_name}']['{col_name}'] = {col_value}", {'tables': tables, 'pd': pd, 'np': np})
+        table_name, col_name = await self._get(["table_name", "col_name"])
+        tables[table_name][col_name], self.engine = evaluate_expression(self.form_data.get("col_value"), table_name, tables)
         return tables
 
 @table_action_type
@@ -103,10 +186,18 @@ class DeleteRow(Action):
     def get_name(self):
         return f"Delete rows with domain: '{self.form_data.get('delete_domain', '?')}' in table '{self.form_data.get('table_name', '?')}'"
 
+    def get_used_columns(self):
+        return get_domain_columns(self.form_data.get('delete_domain', ''))
+
+    def is_row_filter(self):
+        return is_row_wise_domain(self.form_data.get('delete_domain', ''))
+
+    async def get_mask(self, table):
+        delete_mask, self.engine = evaluate_domain(table, self.form_data.get('delete_domain'))
+        return ~delete_mask
+
     async def execute(self, tables):
-        table_name, delete_domain = await self._get(["table_name", "delete_domain"])
-        tables[table_name] = tables[table_name].query(f"not ({delete_domain})")
-        return tables
+        return await self._filter_rows(tables)
     
 @table_action_type
 class KeepRow(Action):
@@ -120,10 +211,18 @@ class KeepRow(Action):
     def get_name(self):
         return f"Keep rows with domain: '{self.form_data.get('keep_domain', '?')}' in table '{self.form_data.get('table_name', '?')}'"
 
+    def get_used_columns(self):
+        return get_domain_columns(self.form_data.get('keep_domain', ''))
+
+    def is_row_filter(self):
+        return is_row_wise_domain(self.form_data.get('keep_domain', ''))
+
+    async def get_mask(self, table):
+        keep_mask, self.engine = evaluate_domain(table, self.form_data.get('keep_domain'))
+        return keep_mask
+
     async def execute(self, tables):
-        table_name, keep_domain = await self._get(["table_name", "keep_domain"])
-        tables[table_name] = tables[table_name].query(f"({keep_domain})")
-        return tables
+        return await self._filter_rows(tables)
 
 @table_action_type
 class DropDuplicates(Action):
@@ -147,7 +246,10 @@ class DropDuplicates(Action):
     async def execute(self, tables):
         table_name, subset, keep = await self._get(["table_name", "subset", "keep"])
         keep_val = keep if keep != 'false' else False
-        tables[table_name] = tables[table_name].drop_duplicates(subset=subset or None, keep=keep_val)
+        table = tables[table_name]
+        tables[table_name] = self._execute_with_backend(
+            lambda: table.iloc[polars_backend.get_unique_positions(table, subset, keep_val)],
+            lambda: table.drop_duplicates(subset=subset or None, keep=keep_val))
         return tables
 
 @table_action_type
@@ -172,6 +274,25 @@ class CreateTable(Action):
     def get_name(self):
         return f"""Create table '{self.form_data.get('table_name', '?')}'"""
 
+    def get_signature(self):
+        signature = super().get_signature()
+        if self.form_data.get("source_creation_type") == "data_source":
+            try:
+                source = DataSourceFactory.init_source_from_dir(self.form_data.get("project_dir"), self.form_data.get("data_source_dir"))
+                signature += source.get_data_version()
+            except FileNotFoundError:
+                pass
+            if self.preview:
+                signature += repr(sorted(self.preview.items()))
+            if self.compact:
+                signature += "compact"
+        return signature
+
+    def get_input_tables(self):
+        if self.form_data.get("source_creation_type") == "other_tables":
+            return {self.form_data.get("table_df")}
+        return set()
+
     async def get_args(self, kwargs=False):
         args = await super().get_args(kwargs)
         project_dir = kwargs.get("project_dir")
@@ -189,15 +310,36 @@ class CreateTable(Action):
         args['table_df']['select_options'] = available_tables
         return args
 
+    async def _get_source(self):
+        project_dir, data_source_dir = await self._get(["project_dir", "data_source_dir"])
+        return DataSourceFactory.init_source_from_dir(project_dir, data_source_dir)
+
+    @staticmethod
+    def _drop_columns(table, excluded_columns):
+        if not excluded_columns:
+            return table
+        return table.drop(columns=[col for col in table.columns if col in excluded_columns])
+
+    async def load_table(self, columns=None, excluded_columns=None):
+        """Table from the data source, with only the given columns (all if None) except the excluded ones"""
+        table = (await self._get_source()).create_table(columns=columns, preview=self.preview)
+        table = self._drop_columns(table, excluded_columns)
+        if self.compact:
+            table, self.compaction = compact_table(table)
+        return table
+
+    async def load_chunks(self, chunk_rows, columns=None, excluded_columns=None):
+        """Same as load_table, by chunks of chunk_rows rows (see DataSource.iter_chunks)"""
+        chunks = (await self._get_source()).iter_chunks(chunk_rows, columns=columns, preview=self.preview)
+        return (self._drop_columns(chunk, excluded_columns) for chunk in chunks)
+
     async def execute(self, tables):
-        table_name, project_dir, data_source_dir, source_creation_type, table_df = await self._get(
-            ["table_name", "project_dir", "data_source_dir", "source_creation_type", "table_df"])
+        table_name, source_creation_type, table_df = await self._get(["table_name", "source_creation_type", "table_df"])
         
         if source_creation_type == "data_source":
-            source = DataSourceFactory.init_source_from_dir(project_dir, data_source_dir)
-            tables[table_name] = source.create_table()
+            tables[table_name] = await self.load_table()
         elif source_creation_type == "other_tables":
-            tables[table_name] = tables[table_df].copy()
+            tables[table_name] = tables[table_df].copy(deep=False)  # Copy-on-write: data is copied on the first change only
         else:
             raise ValueError("Invalid source_creation_type")
         
@@ -216,8 +358,14 @@ class CustomAction(Action):
     def get_name(self):
         return f"Custom action '{self.form_data.get('custom_action_name', '?')}'"
 
+    def get_input_tables(self):
+        return None
+
+    def get_output_tables(self):
+        return None
+
     async def execute(self, tables):
-        table_name, custom_action_code = await self._get(["table_name", "custom_action_code"])
+        custom_action_code = compile_sq_action(self.form_data.get("custom_action_code"), self.form_data.get("table_name"))
         exec(custom_action_code, {'tables': tables, 'pd': pd, 'np': np})
         return tables
 
@@ -237,9 +385,14 @@ class MergeTables(Action):
     def get_name(self):
         return f"Merge table '{self.form_data.get('table_name', '?')}' with '{self.form_data.get('table2', '?')}'"
 
+    def get_input_tables(self):
+        return super().get_input_tables() | {self.form_data.get('table2')}
+
     async def execute(self, tables):
         table_name, table2, on, how = await self._get(["table_name", "table2", "on", "how"])
-        tables[table_name] = pd.merge(tables[table_name], tables[table2], on=on, how=how)
+        tables[table_name] = self._execute_with_backend(
+            lambda: polars_backend.merge(tables[table_name], tables[table2], on, how),
+            lambda: pd.merge(tables[table_name], tables[table2], on=on, how=how))
         return tables
 
 @table_action_type
@@ -254,6 +407,9 @@ class ConcatenateTables(Action):
     def get_name(self):
         return f"Concatenate table '{self.form_data.get('table_name', '?')}' with '{self.form_data.get('table', '?')}'"
 
+    def get_input_tables(self):
+        return super().get_input_tables() | {self.form_data.get('table')}
+
     async def execute(self, tables):
         table_name, table = await self._get(["table_name", "table"])
         tables[table_name] = pd.concat([tables[table_name], tables[table]], ignore_index=True)
@@ -261,6 +417,8 @@ class ConcatenateTables(Action):
 
 @table_action_type
 class GroupBy(Action):
+    drops_other_columns = True
+
     def __init__(self, form_data):
         super().__init__(form_data)
         self.icons = ["fas fa-layer-group", "fas fa-chart-bar"]
@@ -275,6 +433,17 @@ class GroupBy(Action):
     def get_name(self):
         return f"Group by '{self.form_data.get('groupby', '?')}' in table '{self.form_data.get('table_name', '?')}'"
 
+    def get_used_columns(self):
+        try:
+            groupby = self.form_data.get('groupby', '')
+            groupby_columns = ast.literal_eval(groupby) if groupby.startswith('[') else [groupby]
+            agg = ast.literal_eval(self.form_data.get('agg') or '{}')
+        except (ValueError, SyntaxError):
+            return None
+        if not isinstance(agg, dict) or not agg:
+            return None
+        return set(groupby_columns) | set(agg.keys())
+
     async def execute(self, tables):
         table_name, groupby, agg = await self._get(["table_name", "groupby", "agg"])
 
@@ -282,7 +451,9 @@ class GroupBy(Action):
         grouped = tables[table_name].groupby(groupby_val)
         
         if agg:
-            tables[table_name] = grouped.agg(agg).reset_index()
+            tables[table_name] = self._execute_with_backend(
+                lambda: polars_backend.group_by(tables[table_name], groupby_val, agg),
+                lambda: grouped.agg(agg).reset_index())
         else:
             tables[table_name] = grouped.reset_index()
         
@@ -291,6 +462,8 @@ class GroupBy(Action):
 # ACTION FOR COLUMNS --------------------------------------------------------------------------------------------------------
 
 class ActionColumn(Action):
+    modifies_column_only = False  # True if the action only changes the values of its column
+
     def __init__(self, form_data):
         super().__init__(form_data)
         self.args.update({
@@ -304,6 +477,16 @@ class ActionColumn(Action):
         if field_name == "col_idx":
             val = eval(val) if val.startswith('(') else val
         return val
+
+    def get_used_columns(self):
+        col_idx = self.form_data.get('col_idx') or ''
+        try:
+            return {ast.literal_eval(col_idx) if col_idx.startswith('(') else col_idx}
+        except (ValueError, SyntaxError):
+            return None
+
+    def get_written_columns(self):
+        return ActionColumn.get_used_columns(self) if self.modifies_column_only else None
     
 @table_action_type
 class DropColumn(ActionColumn):
@@ -314,6 +497,12 @@ class DropColumn(ActionColumn):
     def get_name(self):
         return f"Drop column '{self.form_data.get('col_name', '?')}' in table '{self.form_data.get('table_name', '?')}'"
 
+    def get_used_columns(self):
+        return set()
+
+    def get_written_columns(self):
+        return super().get_used_columns()
+
     async def execute(self, tables):
         table_name, col_name, col_idx = await self._get(["table_name", "col_name", "col_idx"])
         tables[table_name] = tables[table_name].drop(columns=[col_idx])
@@ -321,6 +510,8 @@ class DropColumn(ActionColumn):
 
 @table_action_type
 class ReplaceVals(ActionColumn):
+    modifies_column_only = True
+
     def __init__(self, form_data):
         super().__init__(form_data)
         self.icons = ["fas fa-exchange-alt", "fas fa-edit"]
@@ -360,12 +551,17 @@ class RemoveUnderOver(ActionColumn):
     def get_name(self):
         return f"Keep values in [{self.form_data.get('lower_bound', '?')}, {self.form_data.get('upper_bound', '?')}] of column '{self.form_data.get('col_name', '?')}' of table '{self.form_data.get('table_name', '?')}'"
 
-    async def execute(self, tables):
-        table_name, col_name, lower_bound, upper_bound, col_idx = await self._get(["table_name", "col_name", "lower_bound", "upper_bound", "col_idx"])
+    def is_row_filter(self):
+        return True
+
+    async def get_mask(self, table):
+        lower_bound, upper_bound, col_idx = await self._get(["lower_bound", "upper_bound", "col_idx"])
         lower_bound = float(lower_bound)
         upper_bound = float(upper_bound)
-        tables[table_name] = tables[table_name][(tables[table_name][col_idx] >= lower_bound) & (tables[table_name][col_idx] <= upper_bound)]
-        return tables
+        return (table[col_idx] >= lower_bound) & (table[col_idx] <= upper_bound)
+
+    async def execute(self, tables):
+        return await self._filter_rows(tables)
 
 @table_action_type
 class NLargest(ActionColumn):
@@ -432,6 +628,8 @@ class RenameColumn(ActionColumn):
 
 @table_action_type
 class CutValues(ActionColumn):
+    modifies_column_only = True
+
     def __init__(self, form_data):
         super().__init__(form_data)
         self.icons = ["fas fa-cut", "fas fa-chart-pie"]
@@ -484,6 +682,8 @@ class SortColumn(ActionColumn):
 
 @table_action_type
 class ChangeType(ActionColumn):
+    modifies_column_only = True
+
     def __init__(self, form_data):
         super().__init__(form_data)
         self.icons = ["fas fa-exchange-alt", "fas fa-database"]
@@ -497,6 +697,9 @@ class ChangeType(ActionColumn):
     def get_name(self):
         return f"Change type of column '{self.form_data.get('col_name', '?')}' to '{self.form_data.get('new_type', '?')}' in table '{self.form_data.get('table_name', '?')}'"
 
+    def is_row_local(self):
+        return self.form_data.get('new_type') != "category"  # Categories depend on all the values of the column
+
     async def execute(self, tables):
         table_name, col_name, new_type, col_idx = await self._get(["table_name", "col_name", "new_type", "col_idx"])
 
@@ -509,6 +712,8 @@ class ChangeType(ActionColumn):
 
 @table_action_type
 class NormalizeColumn(ActionColumn):
+    modifies_column_only = True
+
     def __init__(self, form_data):
         super().__init__(form_data)
         self.icons = ["fas fa-balance-scale", "fas fa-chart-line"]
@@ -550,6 +755,9 @@ class HandleMissingValues(ActionColumn):
     def get_name(self):
         return f"Handle missing values in column '{self.form_data.get('col_name', '?')}' of table '{self.form_data.get('table_name', '?')}'"
 
+    def get_written_columns(self):
+        return super().get_used_columns() if self.form_data.get('action') != "delete" else None
+
     async def execute(self, tables):
         table_name, col_name, action, replace_value, col_idx = await self._get(["table_name", "col_name", "action", "replace_value", "col_idx"])
         
@@ -578,6 +786,12 @@ class ApplyFunction(ActionColumn):
     def get_name(self):
         return f"Apply custom function to column '{self.form_data.get('col_name', '?')}' of table '{self.form_data.get('table_name', '?')}'"
 
+    def get_used_columns(self):
+        return None
+
+    def get_written_columns(self):
+        return super().get_used_columns()
+
     async def execute(self, tables):
         table_name, col_name, function, col_idx = await self._get(["table_name", "col_name", "function", "col_idx"])
         func = eval(f"lambda row: {function}")
@@ -607,6 +821,8 @@ class ColDiff(ActionColumn):
 
 @table_action_type
 class MathOperations(ActionColumn):
+    modifies_column_only = True
+
     def __init__(self, form_data):
         super().__init__(form_data)
         self.icons = ["fas fa-calculator", "fas fa-square-root-alt"]
@@ -621,6 +837,9 @@ class MathOperations(ActionColumn):
 
     def get_name(self):
         return f"Apply {self.form_data.get('operation', '?')} operation to column '{self.form_data.get('col_name', '?')}' of table '{self.form_data.get('table_name', '?')}'"
+
+    def is_row_local(self):
+        return True
   
     async def execute(self, tables):
         table_name, col_name, operation, decimals, col_idx = await self._get(["table_name", "col_name", "operation", "decimals", "col_idx"])
@@ -640,6 +859,8 @@ class MathOperations(ActionColumn):
 
 @table_action_type
 class ReplaceInCell(ActionColumn):
+    modifies_column_only = True
+
     def __init__(self, form_data):
         super().__init__(form_data)
         self.icons = ["fas fa-search", "fas fa-exchange-alt"]
@@ -656,19 +877,28 @@ class ReplaceInCell(ActionColumn):
     def get_name(self):
         return f"Replace values in cell in column '{self.form_data.get('col_name', '?')}' of table '{self.form_data.get('table_name', '?')}'"
 
+    def is_row_local(self):
+        return True
+
     async def execute(self, tables):
         table_name, col_name, col_idx, action, regex, replacement = await self._get(["table_name", "col_name", "col_idx", "action", "regex", "replacement"])
         
         if action == "whitespace":
-            tables[table_name][col_idx] = tables[table_name][col_idx].str.replace(r'\s+', replacement, regex=True)
+            pattern = r'\s+'
         elif action == "regex":
-            tables[table_name][col_idx] = tables[table_name][col_idx].str.replace(regex, replacement, regex=True)
+            pattern = regex
         else:
             raise ValueError("Invalid action for replacing in cell")
+        column = tables[table_name][col_idx]
+        tables[table_name][col_idx] = self._execute_with_backend(
+            lambda: polars_backend.string_operation(column, "replace", pattern, replacement),
+            lambda: column.str.replace(pattern, replacement, regex=True))
         return tables
     
 @table_action_type
 class FormatString(ActionColumn):
+    modifies_column_only = True
+
     def __init__(self, form_data):
         super().__init__(form_data)
         self.icons = ["fas fa-font", "fas fa-text-height"]
@@ -681,6 +911,9 @@ class FormatString(ActionColumn):
     def get_name(self):
         return f"Format string in column '{self.form_data.get('col_name', '?')}' of table '{self.form_data.get('table_name', '?')}'"
 
+    def is_row_local(self):
+        return True
+
     async def execute(self, tables):
         table_name, col_name, operation, col_idx = await self._get(["table_name", "col_name", "operation", "col_idx"])
         
@@ -697,5 +930,8 @@ class FormatString(ActionColumn):
         if operation not in str_methods:
             raise ValueError("Invalid string operation")
         
-        tables[table_name][col_idx] = str_methods[operation](tables[table_name][col_idx])
+        column = tables[table_name][col_idx]
+        tables[table_name][col_idx] = self._execute_with_backend(
+            lambda: polars_backend.string_operation(column, operation),
+            lambda: str_methods[operation](column))
         return tables
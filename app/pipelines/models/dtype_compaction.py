@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+try:
+    ARROW_STRING_DTYPE = pd.StringDtype("pyarrow", na_value=np.nan)
+except (ImportError, TypeError):
+    ARROW_STRING_DTYPE = None
+
+
+def _compact_column(column: pd.Series) -> pd.Series:
+    if pd.api.types.is_numeric_dtype(column) or isinstance(column.dtype, pd.CategoricalDtype):
+        return column
+    if ARROW_STRING_DTYPE is not None and column.dtype != ARROW_STRING_DTYPE \
+            and pd.api.types.infer_dtype(column, skipna=True) == "string":
+        return column.astype(ARROW_STRING_DTYPE)
+    return column
+
+
+def compact_table(table: pd.DataFrame) -> tuple[pd.DataFrame, dict]:
+    """
+    Table with smaller dtypes, and the bytes saved by column (only the compacted ones)
+      * Strings use the Arrow storage (if pyarrow is installed), they behave the same in the next actions
+      * Numeric widths are kept and strings do not become categories, as the next actions compute with them
+        (e.g. an int8 column would overflow, a category can not be concatenated or ordered)
+    """
+    compacted_columns, saved_bytes = {}, {}
+    for position, col_idx in enumerate(table.columns):
+        column = table.iloc[:, position]
+        try:
+            compacted = _compact_column(column)
+        except (TypeError, ValueError):
+            continue
+        saved = int(column.memory_usage(index=False, deep=True) - compacted.memory_usage(index=False, deep=True))
+        if compacted is not column and saved > 0:
+            compacted_columns[position] = compacted
+            saved_bytes[str(col_idx)] = saved
+    if not compacted_columns:
+        return table, saved_bytes
+    table = table.copy(deep=False)
+    for position, compacted in compacted_columns.items():
+        table.isetitem(position, compacted)
+    return table, saved_bytes
@@ -0,0 +1,203 @@
+import ast
+import functools
+import io
+import tokenize
+import numpy as np
+import pandas as pd
+
+try:
+    import numexpr  # noqa: F401
+    NUMEXPR_AVAILABLE = True
+except ImportError:
+    NUMEXPR_AVAILABLE = False
+
+NUMEXPR_MIN_ROWS = 10_000
+NUMEXPR_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Compare, ast.BoolOp, ast.Constant, ast.Name, ast.Load,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.Mod, ast.USub, ast.UAdd, ast.Invert, ast.Not,
+    ast.And, ast.Or, ast.BitAnd, ast.BitOr, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE,
+)
+
+ROW_WISE_NODES = NUMEXPR_NODES + (
+    ast.Attribute, ast.Call, ast.keyword, ast.List, ast.Tuple, ast.In, ast.NotIn, ast.Is, ast.IsNot, ast.FloorDiv,
+)
+ROW_WISE_ACCESSORS = ("str", "dt")
+ROW_WISE_METHODS = ("isin", "isna", "notna", "isnull", "notnull", "between", "abs", "round")
+
+
+class SqActionTransformer(ast.NodeTransformer):
+    """
+    t[t_name] means 'table with name t_name' and is accessed by tables[t_name]
+    t[t_name]c[name] means 'column with name name in table t_name' and is accessed by tables[t_name][name]
+    c[name] means 'column with name name in actual_table' and is accessed by tables[actual_table_name][name]
+    """
+    def __init__(self, actual_table_name=None):
+        self.actual_table_name = actual_table_name
+
+    @staticmethod
+    def join_table_columns(code):
+        """t[t_name]c[name] is not valid python, the 'c' is removed to get t[t_name][name]"""
+        lines = code.splitlines(keepends=True)
+        previous_token, removed = None, []
+        for token in tokenize.generate_tokens(io.StringIO(code).readline):
+            if token.type == tokenize.NAME and token.string == 'c' \
+                    and previous_token and previous_token.string == ']' and previous_token.end == token.start:
+                removed.append(token.start)
+            previous_token = token
+        for row, col in reversed(removed):
+            lines[row - 1] = lines[row - 1][:col] + lines[row - 1][col + 1:]
+        return "".join(lines)
+
+    def parse(self, code, mode='exec'):
+        tree = ast.parse(self.join_table_columns(code.strip()), mode=mode)
+        return ast.fix_missing_locations(self.visit(tree))
+
+    def visit_Subscript(self, node):
+        self.generic_visit(node)
+        if isinstance(node.value, ast.Name) and node.value.id == 't':
+            node.value = ast.Name(id='tables', ctx=ast.Load())
+        elif isinstance(node.value, ast.Name) and node.value.id == 'c':
+            node.value = ast.Subscript(value=ast.Name(id='tables', ctx=ast.Load()),
+                                       slice=ast.Constant(self.actual_table_name), ctx=ast.Load())
+        return node
+
+
+def convert_sq_action_to_python(code, actual_table_name=None):
+    return ast.unparse(SqActionTransformer(actual_table_name).parse(code))
+
+
+@functools.lru_cache(maxsize=256)
+def compile_sq_action(code, actual_table_name=None, mode='exec'):
+    """Code object of the sq_action code, cached as actions are executed on each (re-)run of the pipeline"""
+    return compile(SqActionTransformer(actual_table_name).parse(code, mode=mode), '<sq_action>', mode)
+
+
+class ColumnReferences(ast.NodeTransformer):
+    """Replaces the columns accessed by tables[t_name][name] by variables, so that numexpr can evaluate the expression"""
+    def __init__(self, tables):
+        self.tables = tables
+        self.columns = {}
+
+    def visit_Subscript(self, node):
+        self.generic_visit(node)
+        table_node = node.value
+        if isinstance(table_node, ast.Subscript) and isinstance(table_node.value, ast.Name) and table_node.value.id == 'tables' \
+                and isinstance(table_node.slice, ast.Constant) and isinstance(node.slice, ast.Constant):
+            table = self.tables.get(table_node.slice.value)
+            if isinstance(table, pd.DataFrame) and node.slice.value in table.columns:
+                variable = f"sq_col_{len(self.columns)}"
+                self.columns[variable] = table[node.slice.value]
+                return ast.Name(id=variable, ctx=ast.Load())
+        return node
+
+
+def _is_numexpr_compatible(tree, columns) -> bool:
+    if not columns or any(
+            not isinstance(column, pd.Series) or len(column) < NUMEXPR_MIN_ROWS
+            or not (pd.api.types.is_numeric_dtype(column) or pd.api.types.is_bool_dtype(column))
+            for column in columns.values()):
+        return False
+    for node in ast.walk(tree):
+        if not isinstance(node, NUMEXPR_NODES):
+            return False
+        if isinstance(node, ast.BoolOp) or isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            return False  # and/or/not on columns raise in python, the result must not depend on the size of the table
+        if isinstance(node, ast.Constant) and type(node.value) not in (int, float, bool):
+            return False
+        if isinstance(node, ast.Name) and node.id not in columns:
+            return False
+    return True
+
+
+def evaluate_expression(code: str, actual_table_name: str, tables: dict):
+    """
+    Evaluates the sq_action expression, returns the result and the engine used
+      * 'numexpr' (multi-threaded, without large temporaries) for arithmetic/boolean operations on numeric columns
+      * 'python' for anything else, small tables, or if numexpr is not installed
+    """
+    if NUMEXPR_AVAILABLE:
+        references = ColumnReferences(tables)
+        tree = references.visit(SqActionTransformer(actual_table_name).parse(code, mode='eval'))
+        if _is_numexpr_compatible(tree, references.columns):
+            try:
+                return pd.eval(ast.unparse(tree), engine='numexpr', local_dict=references.columns), 'numexpr'
+            except Exception:
+                pass
+    python_code = compile_sq_action(code, actual_table_name, mode='eval')
+    return eval(python_code, {'tables': tables, 'pd': pd, 'np': np}), 'python'
+
+
+def get_domain_columns(domain: str):
+    """Names used in the domain (see DataFrame.query), None if it can not be parsed"""
+    try:
+        tree = ast.parse(domain.strip(), mode='eval')
+    except SyntaxError:
+        return None
+    return {node.id for node in ast.walk(tree) if isinstance(node, ast.Name)}
+
+
+def get_expression_columns(code: str, actual_table_name: str):
+    """Columns of the actual table used in the sq_action code, None if the table is not only accessed by column names"""
+    try:
+        tree = SqActionTransformer(actual_table_name).parse(code)
+    except (SyntaxError, tokenize.TokenError):
+        return None
+    columns, table_accesses, column_accesses = set(), 0, 0
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Subscript):
+            continue
+        if isinstance(node.value, ast.Name) and node.value.id == 'tables':
+            table_accesses += not isinstance(node.slice, ast.Constant) or node.slice.value == actual_table_name
+        elif isinstance(node.value, ast.Subscript) and isinstance(node.value.value, ast.Name) and node.value.value.id == 'tables' \
+                and isinstance(node.value.slice, ast.Constant) and node.value.slice.value == actual_table_name \
+                and isinstance(node.slice, ast.Constant):
+            columns.add(node.slice.value)
+            column_accesses += 1
+    return columns if table_accesses == column_accesses else None
+
+
+def _is_row_wise(tree) -> bool:
+    for node in ast.walk(tree):
+        if not isinstance(node, ROW_WISE_NODES):
+            return False
+        if isinstance(node, ast.Call) and not (isinstance(node.func, ast.Attribute) and (
+                node.func.attr in ROW_WISE_METHODS
+                or isinstance(node.func.value, ast.Attribute) and node.func.value.attr in ROW_WISE_ACCESSORS and node.func.attr != 'cat')):
+            return False
+        if isinstance(node, ast.Attribute) and not (
+                node.attr in ROW_WISE_ACCESSORS + ROW_WISE_METHODS
+                or isinstance(node.value, ast.Attribute) and node.value.attr in ROW_WISE_ACCESSORS):
+            return False
+    return True
+
+
+def is_row_wise_domain(domain: str) -> bool:
+    """True if the domain (see DataFrame.query) computes each row from its own values only (no aggregation like c.mean())"""
+    try:
+        tree = ast.parse(domain.strip(), mode='eval')
+    except SyntaxError:
+        return False
+    return _is_row_wise(tree)
+
+
+def is_row_wise_expression(code: str, actual_table_name: str) -> bool:
+    """True if the sq_action expression computes each row from the columns of the actual table in this row only"""
+    columns = get_expression_columns(code, actual_table_name)
+    if columns is None:
+        return False
+    try:
+        tree = SqActionTransformer(actual_table_name).parse(code, mode='eval')
+    except (SyntaxError, tokenize.TokenError):
+        return False
+    tree = ColumnReferences({actual_table_name: pd.DataFrame(columns=list(columns))}).visit(tree)
+    return not any(isinstance(node, ast.Name) and node.id == 'tables' for node in ast.walk(tree)) and _is_row_wise(tree)
+
+
+def evaluate_domain(table: pd.DataFrame, domain: str):
+    """Evaluates the domain (see DataFrame.query) on the table, returns the boolean mask and the engine used"""
+    if NUMEXPR_AVAILABLE and len(table.index) >= NUMEXPR_MIN_ROWS:
+        try:
+            return table.eval(domain, engine='numexpr'), 'numexpr'
+        except Exception:
+            pass
+    return table.eval(domain, engine='python'), 'python'
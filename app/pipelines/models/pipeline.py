@@ -1,9 +1,21 @@
 import os
 import pickle
+import time
+import tracemalloc
 import pandas as pd
 from typing import List
 
+from app.pipelines.models.action_cache import ActionCache
 from app.pipelines.models.pipeline_action import PipelineAction
+from app.pipelines.models.pipeline_checkpoints import PipelineCheckpoints
+from app.pipelines.models.pipeline_memory import PipelineMemory
+from app.pipelines.models.pipeline_plan import get_execution_plan
+from app.pipelines.models.pipeline_scheduler import PipelineScheduler
+from app.projects.models.project import Project
+from app.utils.object_cache import ObjectCache
+
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)  # Always enabled from pandas 3
 
 
 class Pipeline:
@@ -11,18 +23,68 @@ class Pipeline:
         self.project_dir = project_dir
         self.pipeline_path = os.path.join(os.getcwd(), "_projects", project_dir, "pipeline.pkl")
         self.actions: List[PipelineAction] = []
+        self.checkpoints = PipelineCheckpoints(project_dir)
         self._load_actions()
 
     def _load_actions(self) -> List[PipelineAction]:
-        with open(self.pipeline_path, 'rb') as f:
-            self.actions = pickle.load(f)
+        self.actions = ObjectCache.load(self.pipeline_path, copy=True)  # Modified by the runs and edits
 
         for action in self.actions:
             action.update_description()
 
     def _save_actions(self):
-        with open(self.pipeline_path, 'wb') as f:
-            pickle.dump(self.actions, f)
+        project = Project.instantiate_from_dir(self.project_dir)
+        signatures = []
+        for full_run in (False, True):  # The checkpoints of the preview and full runs are kept
+            self._set_run_settings(project, full_run)
+            plan = self._get_plan(project)
+            signatures += PipelineCheckpoints.get_signatures(plan)
+        self._set_skipped_actions(plan)
+        try:
+            with open(self.pipeline_path, 'wb') as f:
+                pickle.dump(self.actions, f)
+        except Exception:
+            ObjectCache.invalidate(self.pipeline_path)
+            raise
+        ObjectCache.set(self.pipeline_path, self.actions, copy=True)
+        self.checkpoints.invalidate(signatures)
+
+    def _set_run_settings(self, project, full_run: bool = False):
+        """Sets the project settings used by the actions during a run (part of their signatures)"""
+        preview = project.get_preview(full_run)
+        for pipeline_action in self.actions:
+            pipeline_action.action.backend = project.misc.get("backend")
+            pipeline_action.action.preview = preview
+            pipeline_action.action.compact = bool(project.misc.get("compact_dtypes"))
+
+    def _set_skipped_actions(self, plan):
+        """Flags the actions not executed by the plan, as their result is never used (see get_skipped_actions)"""
+        executed_indexes = {idx for step in plan for idx in step.indexes}
+        for idx, pipeline_action in enumerate(self.actions):
+            pipeline_action.skipped = idx not in executed_indexes
+            if pipeline_action.skipped:
+                pipeline_action.profile = None
+
+    @staticmethod
+    def _get_action_key(pipeline_action) -> tuple:
+        action = pipeline_action.action
+        return action.__class__.__name__, repr(action.form_data)
+
+    def _save_run_results(self):
+        """
+        Saves the run fields (profile, error) of the actions into the latest pipeline, which may have been edited during the run
+          * An action of the run is matched with an unmatched action of the same class and form data, in order
+        """
+        run_actions = {}
+        for pipeline_action in self.actions:
+            run_actions.setdefault(self._get_action_key(pipeline_action), []).append(pipeline_action)
+        latest_pipeline = Pipeline(self.project_dir)
+        for pipeline_action in latest_pipeline.actions:
+            matches = run_actions.get(self._get_action_key(pipeline_action))
+            if matches:
+                run_action = matches.pop(0)
+                pipeline_action.profile, pipeline_action.error = run_action.profile, run_action.error
+        latest_pipeline._save_actions()
 
     def get_actions(self):
         return self.actions
@@ -72,15 +134,116 @@ class Pipeline:
         self.actions.append(PipelineAction(self, action))
         self._save_actions()
 
-    async def run_pipeline(self):
-        tables = {}
-        for pipeline_action in self.actions:              
+    async def run_pipeline(self, run=None, full_run: bool = False):
+        """
+        run (PipelineRun) is informed of the progress, and allows to cancel the run between actions
+        full_run: run on the full data even if a preview is set in the project settings (see Project.get_preview)
+        The tables are kept under the memory budget of the project settings during the run (see PipelineMemory)
+        """
+        project = Project.instantiate_from_dir(self.project_dir)
+        action_cache = ActionCache(self.project_dir, max_size_mb=project.misc.get("action_cache_mb"))
+        self._set_run_settings(project, full_run)
+        plan = self._get_plan(project)
+        self._set_skipped_actions(plan)
+        signatures = PipelineCheckpoints.get_signatures(plan)
+        keys = ActionCache.get_keys(plan)
+        start_idx, tables, table_keys = self.checkpoints.resume(signatures, action_cache)
+        self.checkpoints.start_run(signatures, start_idx, table_keys)
+        memory = PipelineMemory(plan, start_idx, budget_mb=float(project.misc.get("memory_budget_mb") or 0),
+                                profile_memory=bool(project.misc.get("profile_memory")))
+
+        scheduler = PipelineScheduler(plan, max_workers=project.misc.get("parallel_workers"))
+        start_tracing = memory.profile_memory and not tracemalloc.is_tracing()
+        if start_tracing:
+            tracemalloc.start()
+        try:
+            await scheduler.run(
+                lambda idx: self._run_step(plan[idx], keys[idx], tables, action_cache, memory, run),
+                on_action_done=lambda idx, result: self.checkpoints.on_action_done(idx, keys[idx], *result),
+                start_idx=start_idx,
+            )
+        finally:
+            action_cache.save()
+            memory.load_all(tables)
+            if start_tracing:
+                tracemalloc.stop()
+
+        self.memory_stats = memory.get_stats()
+        if run:
+            run.add_event("pipeline_done", **self.memory_stats)
+        self._save_run_results()
+        return tables
+
+    @staticmethod
+    def _get_shape(tables, table_names) -> tuple[int, int]:
+        """Total number of rows and columns of the given tables (all tables if None)"""
+        table_names = tables.keys() if table_names is None else table_names
+        shapes = [tables[name].shape for name in table_names if name in tables]
+        return sum(rows for rows, _ in shapes), sum(cols for _, cols in shapes)
+
+    async def _run_step(self, step, key, tables, action_cache, memory, run=None):
+        """
+        Executes the step of the plan (or reuses its cached result), returns the written tables and if the step is a barrier
+          * The step is profiled (see PipelineAction.profile), its memory peak only with the profile_memory setting
+        """
+        if run:
+            run.check_cancelled()
+            for idx, pipeline_action in zip(step.indexes, step.pipeline_actions):
+                run.add_event("action_start", idx=idx, description=pipeline_action.description)
+        memory.acquire(step, tables)
+        try:
+            return await self._execute_step(step, key, tables, action_cache, memory, run)
+        finally:
+            memory.release(step, tables)
+
+    async def _execute_step(self, step, key, tables, action_cache, memory, run=None):
+        rows_in, cols_in = self._get_shape(tables, step.action.get_input_tables())
+        start_time, start_cpu_time = time.perf_counter(), time.thread_time()
+        step_profile = memory.start_step_profile()
+
+        output_tables = step.action.get_output_tables()
+        result_tables = action_cache.get(key)
+        is_cached = result_tables is not None
+        step.action.engine = None
+        step.action.compaction = None
+        if not is_cached:
             try:
-                await pipeline_action.action.execute(tables)
+                await step.action.execute(tables)
             except Exception as e:
-                pipeline_action.error = str(e)
-                self._save_actions()
-                raise Exception(f"Error executing action '{pipeline_action.description}': {e}")
+                for pipeline_action in step.pipeline_actions:
+                    pipeline_action.error = str(e)
+                self._save_run_results()
+                raise Exception(f"Error executing action '{step.description}': {e}")
+            result_tables = dict(tables) if output_tables is None else {name: tables[name] for name in output_tables if name in tables}
+            action_cache.set(key, result_tables)
 
-        self._save_actions()
-        return tables
+        if output_tables is None:
+            tables.clear()
+        tables.update(result_tables)
+
+        rows_out, cols_out = self._get_shape(result_tables, None)
+        profile = {
+            "wall_time": round(time.perf_counter() - start_time, 3),
+            "cpu_time": round(time.thread_time() - start_cpu_time, 3),
+            "memory_peak": memory.get_step_peak(step_profile),
+            "rows_in": rows_in, "cols_in": cols_in,
+            "rows_out": rows_out, "cols_out": cols_out,
+            "cached": is_cached,
+            "engine": step.action.engine,
+            "compaction": step.action.compaction,
+            "fused": len(step.indexes),
+        }
+        for idx, pipeline_action in zip(step.indexes, step.pipeline_actions):
+            pipeline_action.profile = dict(profile)
+            if run:
+                run.add_event("action_done", idx=idx, description=pipeline_action.description,
+                              summary=pipeline_action.get_profile_summary(), **profile)
+        return list(result_tables), output_tables is None
+
+    def _get_plan(self, project=None):
+        project = project or Project.instantiate_from_dir(self.project_dir)
+        return get_execution_plan(self.actions, lazy=project.misc.get("lazy_mode"), chunk_rows=int(project.misc.get("chunk_rows") or 0))
+
+    def get_execution_plan(self) -> list[dict]:
+        """Steps actually executed by run_pipeline (e.g. with fused filters), for debugging"""
+        return [step.to_dict() for step in self._get_plan()]
@@ -6,6 +6,8 @@ class PipelineAction:
         self.custom_description = None
         self.description = False
         self.error = None
+        self.profile = None
+        self.skipped = False
         self.update_description()
 
     def _set_field(self, field_name, value):
@@ -19,6 +21,8 @@ class PipelineAction:
         """
         self.__dict__.update(state)
         self._set_field('custom_description', None)
+        self._set_field('profile', None)
+        self._set_field('skipped', False)
 
     def update_description(self):
         if self.custom_description and self.custom_description.strip():
@@ -29,3 +33,19 @@ class PipelineAction:
     def set_custom_description(self, description):
         self.custom_description = description
         self.update_description()
+
+    def get_profile_summary(self) -> str:
+        """Short description of the last execution of the action, from its profile"""
+        if not self.profile:
+            return ""
+        p = self.profile
+        summary = f"{p['wall_time']}s (cpu {p['cpu_time']}s) | {p['rows_in']}x{p['cols_in']} → {p['rows_out']}x{p['cols_out']}"
+        if p.get('memory_peak') is not None:
+            summary += f" | +{p['memory_peak'] / 1024 / 1024:.1f} MB"
+        if p.get('engine'):
+            summary += f" | {p['engine']}"
+        if p.get('compaction'):
+            summary += f" | compacted -{sum(p['compaction'].values()) / 1024 / 1024:.1f} MB"
+        if p.get('fused', 1) > 1:
+            summary += f" | fused x{p['fused']}"
+        return summary + (" (cached)" if p['cached'] else "")
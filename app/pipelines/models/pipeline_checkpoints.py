@@ -0,0 +1,93 @@
+import hashlib
+import json
+import os
+
+
+class PipelineCheckpoints:
+    """
+    Stores the state of the tables obtained after each pipeline action
+      * A checkpoint is named after the signature of all the actions up to it (included),
+        any change in an action invalidates the checkpoints from this action onward only
+      * The content of the tables lives in the action cache, a checkpoint only maps each table to its cache key
+    """
+    def __init__(self, project_dir: str):
+        self.path = os.path.join(os.getcwd(), "_projects", project_dir, "checkpoints")
+
+    @staticmethod
+    def get_signatures(actions) -> list[str]:
+        signatures = []
+        previous_signature = ""
+        for pipeline_action in actions:
+            action_signature = pipeline_action.action.get_signature()
+            previous_signature = hashlib.sha256(f"{previous_signature}{action_signature}".encode()).hexdigest()
+            signatures.append(previous_signature)
+        return signatures
+
+    def _get_checkpoint_path(self, signature: str) -> str:
+        return os.path.join(self.path, f"{signature}.json")
+
+    def resume(self, signatures: list[str], action_cache) -> tuple[int, dict, dict]:
+        """Returns the index of the first action to execute, the tables to start from and their cache keys"""
+        for idx in range(len(signatures) - 1, -1, -1):
+            checkpoint_path = self._get_checkpoint_path(signatures[idx])
+            if not os.path.exists(checkpoint_path):
+                continue
+            with open(checkpoint_path, 'r') as f:
+                table_keys = json.load(f)
+            tables = self._load_tables(table_keys, action_cache)
+            if tables is not None:
+                return idx + 1, tables, table_keys
+        return 0, {}, {}
+
+    @staticmethod
+    def _load_tables(table_keys: dict, action_cache):
+        tables = {}
+        for key in set(table_keys.values()):
+            cached_tables = action_cache.get(key, count=False)
+            if cached_tables is None:
+                return None
+            tables.update({name: cached_tables[name] for name, table_key in table_keys.items() if table_key == key})
+        return tables
+
+    def save(self, signature: str, table_keys: dict):
+        os.makedirs(self.path, exist_ok=True)
+        with open(self._get_checkpoint_path(signature), 'w') as f:
+            json.dump(table_keys, f)
+
+    def start_run(self, signatures: list[str], start_idx: int, table_keys: dict):
+        self.signatures = signatures
+        self.prefix_end = start_idx - 1
+        self.done = set()
+        self.table_history = {name: [(start_idx - 1, key)] for name, key in table_keys.items()}
+
+    def on_action_done(self, idx: int, key: str, table_names, is_barrier: bool):
+        """
+        Actions can be completed in any order (see PipelineScheduler): a checkpoint is saved each time
+        the first actions of the pipeline are all completed, with the tables as they were right after the last one
+        """
+        if is_barrier:
+            self.table_history = {}
+        for name in table_names:
+            self.table_history.setdefault(name, []).append((idx, key))
+
+        self.done.add(idx)
+        while self.prefix_end + 1 in self.done:
+            self.prefix_end += 1
+            self.save(self.signatures[self.prefix_end], self._get_table_keys(self.prefix_end))
+
+    def _get_table_keys(self, idx: int) -> dict:
+        table_keys = {}
+        for name, history in self.table_history.items():
+            keys = [key for action_idx, key in history if action_idx <= idx]
+            if keys:
+                table_keys[name] = keys[-1]
+        return table_keys
+
+    def invalidate(self, signatures: list[str]):
+        """Removes the checkpoints that do not match the actual pipeline anymore"""
+        if not os.path.exists(self.path):
+            return
+        valid_files = {f"{signature}.json" for signature in signatures}
+        for file_name in os.listdir(self.path):
+            if file_name not in valid_files:
+                os.remove(os.path.join(self.path, file_name))
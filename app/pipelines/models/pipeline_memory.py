@@ -0,0 +1,139 @@
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import tracemalloc
+
+
+class PipelineMemory:
+    """
+    Keeps the tables of a pipeline run under a memory budget (see the plan steps reading/writing them)
+      * A table overwritten by the next step using it is dropped as soon as no running step uses it
+      * Over the budget, the tables read again the latest (or only at the end of the run) are spilled to disk,
+        and reloaded when a step reads them
+      * Tables used by running steps are never spilled (steps run in parallel, see PipelineScheduler)
+      * With profile_memory, the memory peak of the steps running alone is measured (tracemalloc is process-wide)
+    """
+    def __init__(self, plan, start_idx: int = 0, budget_mb: float = 0, profile_memory: bool = False):
+        self.plan = plan
+        self.step_indexes = {id(step): idx for idx, step in enumerate(plan)}
+        self.pending = set(range(start_idx, len(plan)))
+        self.running = {}
+        self.budget = budget_mb * 1024 * 1024
+        self.sizes = {}
+        self.spilled = {}
+        self.spill_path = None
+        self.tables_peak = 0
+        self.memory_peak = 0
+        self.spilled_count = 0
+        self.profile_memory = profile_memory
+        self._step_starts = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_size(table) -> int:
+        try:
+            return int(table.memory_usage(index=True, deep=True).sum())
+        except AttributeError:
+            return 0
+
+    def acquire(self, step, tables: dict):
+        """Loads the (spilled) tables read by the step, they can not be spilled until the step is released"""
+        idx = self.step_indexes[id(step)]
+        input_tables, output_tables = step.action.get_input_tables(), step.action.get_output_tables()
+        with self._lock:
+            self.pending.discard(idx)
+            self.running[idx] = None if None in (input_tables, output_tables) else input_tables | output_tables
+            for name in list(self.spilled) if self.running[idx] is None else input_tables & set(self.spilled):
+                self._reload(name, tables)
+            for name in set(self.spilled) & (output_tables or set()):
+                os.remove(self.spilled.pop(name))  # Overwritten by the step
+
+    def start_step_profile(self):
+        """To be called by an acquired step, returns what get_step_peak needs (None if the peak can not be measured)"""
+        with self._lock:
+            self._step_starts += 1
+            if not self.profile_memory or not tracemalloc.is_tracing() or len(self.running) > 1:
+                return None
+            tracemalloc.reset_peak()
+            return tracemalloc.get_traced_memory()[0], self._step_starts
+
+    def get_step_peak(self, step_profile) -> int:
+        """Memory peak of the step since start_step_profile, None if another step started meanwhile"""
+        with self._lock:
+            if step_profile is None or step_profile[1] != self._step_starts:
+                return None
+            return max(0, tracemalloc.get_traced_memory()[1] - step_profile[0])
+
+    def release(self, step, tables: dict):
+        """Drops and spills the tables to get back under the budget, once the step is done"""
+        idx = self.step_indexes[id(step)]
+        with self._lock:
+            del self.running[idx]
+            self.memory_peak = max(self.memory_peak, tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else 0)
+            output_tables = step.action.get_output_tables()
+            for name, table in list(tables.items()):
+                if output_tables is None or name in output_tables or self.sizes.get(name, (None,))[0] is not table:
+                    self.sizes[name] = (table, self.get_size(table))
+            for name in set(self.sizes) - set(tables):
+                del self.sizes[name]
+            self.tables_peak = max(self.tables_peak, self._get_tables_size())
+
+            if None in self.running.values():
+                return
+            used_tables = set().union(*self.running.values())
+            next_uses = {name: self._get_next_use(name) for name in tables if name not in used_tables}
+            for name, next_use in next_uses.items():
+                if next_use is None:
+                    del tables[name], self.sizes[name]
+            if not self.budget:
+                return
+            spillable = sorted((name for name, next_use in next_uses.items() if next_use is not None),
+                               key=lambda name: next_uses[name], reverse=True)
+            for name in spillable:
+                if self._get_tables_size() <= self.budget:
+                    break
+                self._spill(name, tables)
+
+    def _get_tables_size(self) -> int:
+        return sum(size for _, size in self.sizes.values())
+
+    def _get_next_use(self, name):
+        """Index of the next step reading the table, infinity if the table is only needed at the end, None if it is overwritten"""
+        for idx in sorted(self.pending):
+            action = self.plan[idx].action
+            input_tables, output_tables = action.get_input_tables(), action.get_output_tables()
+            if input_tables is None or name in input_tables:
+                return idx
+            if output_tables is None or name in output_tables:
+                return None if output_tables is not None else idx
+        return float('inf')
+
+    def _spill(self, name, tables):
+        if self.spill_path is None:
+            self.spill_path = tempfile.mkdtemp(prefix="squirrel_spill_")
+        path = os.path.join(self.spill_path, f"{self.spilled_count}.pkl")
+        with open(path, 'wb') as f:
+            pickle.dump(tables.pop(name), f, protocol=pickle.HIGHEST_PROTOCOL)
+        del self.sizes[name]
+        self.spilled[name] = path
+        self.spilled_count += 1
+
+    def _reload(self, name, tables):
+        path = self.spilled.pop(name)
+        with open(path, 'rb') as f:
+            tables[name] = pickle.load(f)
+        os.remove(path)
+
+    def load_all(self, tables: dict):
+        """Reloads all the spilled tables (end of the run), and removes the spill directory"""
+        with self._lock:
+            for name in list(self.spilled):
+                self._reload(name, tables)
+            if self.spill_path:
+                shutil.rmtree(self.spill_path, ignore_errors=True)
+                self.spill_path = None
+
+    def get_stats(self) -> dict:
+        return {"memory_peak": self.memory_peak, "tables_peak": self.tables_peak, "spilled": self.spilled_count}
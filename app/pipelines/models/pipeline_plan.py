@@ -0,0 +1,366 @@
+import pickle
+import tempfile
+import numpy as np
+import pandas as pd
+
+from pandas.api.indexers import check_array_indexer
+
+from app.pipelines.models.dtype_compaction import compact_table
+
+
+class FusedFilters:
+    """
+    Consecutive row filters on the same table (see Action.is_row_filter), executed with a single combined mask
+      * Each filter only depends on the values of the row, so evaluating it on the unfiltered table gives the same result
+      * If a mask can not be computed on the unfiltered table, the filters are executed one after the other
+    """
+    engine = None
+
+    def __init__(self, actions):
+        self.actions = actions
+        self.table_name = actions[0].form_data.get('table_name')
+
+    def get_name(self):
+        return f"Fused filters on table '{self.table_name}': " + "; ".join(action.get_name() for action in self.actions)
+
+    def get_signature(self):
+        return repr((self.__class__.__name__, [action.get_signature() for action in self.actions]))
+
+    def get_input_tables(self):
+        return {self.table_name}
+
+    def get_output_tables(self):
+        return {self.table_name}
+
+    async def execute(self, tables):
+        table = tables[self.table_name]
+        try:
+            mask = np.ones(len(table.index), dtype=bool)
+            for action in self.actions:
+                mask &= check_array_indexer(table.index, await action.get_mask(table))  # As table[mask], e.g. NaN raises
+        except Exception:
+            for action in self.actions:
+                await action.execute(tables)
+        else:
+            tables[self.table_name] = table[mask]
+        self.engine = "/".join(sorted({action.engine for action in self.actions if action.engine})) or None
+        return tables
+
+
+def _describe_columns(columns, excluded_columns) -> str:
+    description = ""
+    if columns is not None:
+        description += f" with columns {sorted(columns, key=str)}"
+    if excluded_columns:
+        description += f" without columns {sorted(excluded_columns, key=str)}"
+    return description
+
+
+def _get_columns_signature(columns, excluded_columns):
+    return sorted(columns, key=str) if columns is not None else None, sorted(excluded_columns or (), key=str)
+
+
+class LoadTable:
+    """
+    CreateTable from a data source, with the row filters and the column selection of the next actions
+    pushed down by the optimizer (lazy mode, see get_execution_plan)
+    """
+    engine = None
+    compaction = None
+
+    def __init__(self, create_action, filters, columns=None, excluded_columns=None):
+        self.create_action = create_action
+        self.filters = filters
+        self.columns = columns
+        self.excluded_columns = excluded_columns
+        self.table_name = create_action.form_data.get('table_name')
+
+    def get_name(self):
+        name = self.create_action.get_name() + _describe_columns(self.columns, self.excluded_columns)
+        if self.filters:
+            name += " and filters: " + "; ".join(action.get_name() for action in self.filters)
+        return name
+
+    def get_signature(self):
+        return repr((self.__class__.__name__, self.create_action.get_signature(),
+                     [action.get_signature() for action in self.filters], _get_columns_signature(self.columns, self.excluded_columns)))
+
+    def get_input_tables(self):
+        return set()
+
+    def get_output_tables(self):
+        return {self.table_name}
+
+    async def execute(self, tables):
+        self.create_action.compaction = None
+        tables[self.table_name] = await self.create_action.load_table(columns=self.columns, excluded_columns=self.excluded_columns)
+        self.compaction = self.create_action.compaction
+        if self.filters:
+            fused_filters = FusedFilters(self.filters)
+            await fused_filters.execute(tables)
+            self.engine = fused_filters.engine
+        return tables
+
+
+class StreamTable:
+    """
+    CreateTable from a data source followed by row local actions on the table (see Action.is_row_local), executed chunk by chunk
+      * Only one chunk of the source is in memory at a time, the results are written to disk as they are computed
+      * The whole table is only materialized at the end, for the next (blocking) action
+    """
+    engine = None
+    compaction = None
+
+    def __init__(self, create_action, actions, chunk_rows, columns=None, excluded_columns=None):
+        self.create_action = create_action
+        self.actions = actions
+        self.chunk_rows = chunk_rows
+        self.columns = columns
+        self.excluded_columns = excluded_columns
+        self.table_name = create_action.form_data.get('table_name')
+
+    def get_name(self):
+        name = self.create_action.get_name() + f" by chunks of {self.chunk_rows} rows"
+        name += _describe_columns(self.columns, self.excluded_columns)
+        return name + ", then: " + "; ".join(action.get_name() for action in self.actions)
+
+    def get_signature(self):
+        return repr((self.__class__.__name__, self.create_action.get_signature(),
+                     [action.get_signature() for action in self.actions], _get_columns_signature(self.columns, self.excluded_columns)))
+
+    def get_input_tables(self):
+        return set()
+
+    def get_output_tables(self):
+        return {self.table_name}
+
+    async def _execute_chunk(self, chunk):
+        chunk_tables = {self.table_name: chunk}
+        for action in self.actions:
+            chunk_tables = await action.execute(chunk_tables)
+        return chunk_tables[self.table_name]
+
+    async def execute(self, tables):
+        load_kwargs = {"columns": self.columns, "excluded_columns": self.excluded_columns}
+        with tempfile.TemporaryFile() as spool_file:
+            chunks_count = 0
+            for chunk in await self.create_action.load_chunks(self.chunk_rows, **load_kwargs):
+                pickle.dump(await self._execute_chunk(chunk), spool_file, protocol=pickle.HIGHEST_PROTOCOL)
+                chunks_count += 1
+            if chunks_count:
+                spool_file.seek(0)
+                table = pd.concat([pickle.load(spool_file) for _ in range(chunks_count)])
+            else:
+                table = await self._execute_chunk(await self.create_action.load_table(**load_kwargs))
+        if self.create_action.compact:
+            table, self.compaction = compact_table(table)  # Once materialized, so that all chunks get the same dtypes
+        tables[self.table_name] = table
+        engines = sorted({action.engine for action in self.actions if action.engine})
+        self.engine = "/".join(engines + [f"{chunks_count} chunks"])
+        return tables
+
+
+class DropExistingColumn:
+    """DropColumn of a column which may not exist, as the actions writing it were skipped or it was not loaded (see get_execution_plan)"""
+    def __init__(self, action):
+        self.action = action
+
+    def __getattr__(self, name):
+        return getattr(self.action, name)
+
+    def get_signature(self):
+        return repr((self.__class__.__name__, self.action.get_signature()))
+
+    async def execute(self, tables):
+        table = tables.get(self.action.form_data.get('table_name'))
+        if table is not None and self.action.get_written_columns() & set(table.columns):
+            await self.action.execute(tables)
+        return tables
+
+
+class PlanStep:
+    """A step of the execution plan of a pipeline: a pipeline action, or several ones executed together"""
+    def __init__(self, pipeline_actions, indexes, action=None):
+        self.pipeline_actions = pipeline_actions
+        self.indexes = indexes
+        self.action = action or pipeline_actions[0].action
+        self.description = self.action.get_name() if action else pipeline_actions[0].description
+
+    def to_dict(self) -> dict:
+        return {"indexes": self.indexes, "description": self.description}
+
+
+def _is_data_source_table(action) -> bool:
+    return action.__class__.__name__ == "CreateTable" and action.form_data.get("source_creation_type") == "data_source"
+
+
+def _is_drop_column(action) -> bool:
+    return action.__class__.__name__ == "DropColumn"
+
+
+def _get_dropped_columns(action) -> set:
+    """Columns removed by the action (overwritten columns keep their position, they are not considered removed)"""
+    return (action.get_written_columns() or set()) if _is_drop_column(action) else set()
+
+
+def _get_overwriting_action(actions, idx, skipped):
+    """Index of the next action overwriting or removing all that the action idx writes before it is read, None if it can be read"""
+    action = actions[idx].action
+    input_tables, output_tables = action.get_input_tables(), action.get_output_tables()
+    if input_tables is None or output_tables is None or len(output_tables) != 1:
+        return None
+    table_name = next(iter(output_tables))
+    written_columns = action.get_written_columns() if action.form_data.get('table_name') == table_name else None
+    for next_idx in range(idx + 1, len(actions)):
+        if next_idx in skipped:
+            continue
+        next_action = actions[next_idx].action
+        next_input_tables, next_output_tables = next_action.get_input_tables(), next_action.get_output_tables()
+        if next_input_tables is None or next_output_tables is None:
+            return None
+        if table_name not in next_input_tables | next_output_tables:
+            continue
+        if table_name not in next_input_tables:
+            return next_idx  # Table overwritten
+        if written_columns is None or next_action.form_data.get('table_name') != table_name:
+            return None
+        used_columns = next_action.get_used_columns()
+        if used_columns is None or used_columns & written_columns:
+            return None
+        if next_action.drops_other_columns:
+            return next_idx
+        if next_action.get_written_columns() is None and not next_action.is_row_filter():
+            return None
+        written_columns = written_columns - _get_dropped_columns(next_action)
+        if not written_columns:
+            return next_idx
+    return None
+
+
+def get_skipped_actions(actions) -> dict[int, int]:
+    """
+    Actions whose result is never used: the tables they write are overwritten, or the columns they write are removed, before being read
+    (the tables remaining at the end are all used, by the tables page), mapped to the index of the overwriting action
+    """
+    skipped = {}
+    for idx in range(len(actions) - 1, -1, -1):
+        overwriting_idx = _get_overwriting_action(actions, idx, skipped)
+        if overwriting_idx is not None:
+            skipped[idx] = overwriting_idx
+    return skipped
+
+
+def _get_pushed_actions(actions, create_idx, can_be_pushed, skipped) -> list[int]:
+    """Indexes of the actions only on the created table (and accepted by can_be_pushed) that can be executed right after its loading"""
+    table_name = actions[create_idx].action.form_data.get('table_name')
+    pushed_actions = []
+    for idx in range(create_idx + 1, len(actions)):
+        if idx in skipped:
+            continue
+        action = actions[idx].action
+        input_tables, output_tables = action.get_input_tables(), action.get_output_tables()
+        if input_tables is None or output_tables is None:
+            break
+        if table_name not in input_tables | output_tables:
+            continue
+        if not (can_be_pushed(action) and input_tables == output_tables == {table_name}):
+            break
+        pushed_actions.append(idx)
+    return pushed_actions
+
+
+def _get_needed_columns(actions, create_idx, skipped):
+    """
+    Columns of the created table read by the next actions (None if all of them can be needed),
+    the columns removed before being read (they do not have to be loaded),
+    and the indexes of the actions working on the table as loaded
+    """
+    table_name = actions[create_idx].action.form_data.get('table_name')
+    needed_columns, unneeded_columns, indexes = set(), set(), []
+    for idx in range(create_idx + 1, len(actions)):
+        if idx in skipped:
+            continue
+        action = actions[idx].action
+        input_tables, output_tables = action.get_input_tables(), action.get_output_tables()
+        if input_tables is None or output_tables is None:
+            return None, unneeded_columns, indexes
+        if table_name not in input_tables | output_tables:
+            continue
+        if table_name not in input_tables:
+            return needed_columns, set(), indexes  # Table overwritten
+        used_columns = action.get_used_columns() if action.form_data.get('table_name') == table_name else None
+        if used_columns is None:
+            return None, unneeded_columns, indexes
+        indexes.append(idx)
+        needed_columns |= used_columns - unneeded_columns
+        if action.drops_other_columns:
+            return needed_columns, set(), indexes
+        if action.get_written_columns() is None and not action.is_row_filter():
+            return None, unneeded_columns, indexes
+        unneeded_columns |= _get_dropped_columns(action) - needed_columns
+    return None, unneeded_columns, indexes
+
+
+def get_execution_plan(actions, lazy: bool = False, chunk_rows: int = 0) -> list[PlanStep]:
+    """
+    Steps executing the pipeline actions
+      * The actions whose result is never used are skipped (see get_skipped_actions)
+      * Consecutive row filters on the same table are fused
+      * In lazy mode, the tables created from a data source only load the columns used afterward
+        and directly apply the row filters following their creation (predicate and projection pushdown)
+      * With chunk_rows, the tables created from a data source are streamed by chunks
+        through the row local actions following their creation (see StreamTable)
+    """
+    skipped = get_skipped_actions(actions)
+    tolerant_drops = {idx for idx in skipped.values() if _is_drop_column(actions[idx].action)}
+
+    pushed_actions, loaded_columns = {}, {}
+    if lazy or chunk_rows:
+        can_be_pushed = (lambda action: action.is_row_local()) if chunk_rows else (lambda action: action.is_row_filter())
+        for idx, pipeline_action in enumerate(actions):
+            if idx in skipped or not _is_data_source_table(pipeline_action.action):
+                continue
+            pushed_actions[idx] = _get_pushed_actions(actions, idx, can_be_pushed, skipped)
+            if lazy:
+                columns, unneeded_columns, table_indexes = _get_needed_columns(actions, idx, skipped)
+                loaded_columns[idx] = (columns, unneeded_columns)
+                tolerant_drops |= {
+                    table_idx for table_idx in table_indexes
+                    if (columns is not None and not _get_dropped_columns(actions[table_idx].action) <= columns)
+                    or _get_dropped_columns(actions[table_idx].action) & unneeded_columns
+                }
+    pushed_indexes = {idx for pushed in pushed_actions.values() for idx in pushed}
+
+    groups = []
+    for idx, pipeline_action in enumerate(actions):
+        if idx in pushed_indexes or idx in skipped:
+            continue
+        action = pipeline_action.action
+        previous_action = actions[groups[-1][-1]].action if groups else None
+        if previous_action and action.is_row_filter() and previous_action.is_row_filter() \
+                and action.form_data.get('table_name') == previous_action.form_data.get('table_name'):
+            groups[-1].append(idx)
+        else:
+            groups.append([idx])
+
+    plan = []
+    for indexes in groups:
+        pipeline_actions = [actions[idx] for idx in indexes]
+        step_action = None
+        if indexes[0] in pushed_actions:
+            create_idx = indexes[0]
+            columns, unneeded_columns = loaded_columns.get(create_idx, (None, set()))
+            if pushed_actions[create_idx] or columns is not None or unneeded_columns:
+                create_action, pushed = pipeline_actions[0].action, [actions[idx].action for idx in pushed_actions[create_idx]]
+                indexes = indexes + pushed_actions[create_idx]
+                pipeline_actions = [actions[idx] for idx in indexes]
+                if chunk_rows and pushed:
+                    step_action = StreamTable(create_action, pushed, chunk_rows, columns, unneeded_columns)
+                else:
+                    step_action = LoadTable(create_action, pushed, columns, unneeded_columns)
+        elif len(indexes) > 1:
+            step_action = FusedFilters([pipeline_action.action for pipeline_action in pipeline_actions])
+        elif indexes[0] in tolerant_drops:
+            step_action = DropExistingColumn(pipeline_actions[0].action)
+        plan.append(PlanStep(pipeline_actions, indexes, step_action))
+    return plan
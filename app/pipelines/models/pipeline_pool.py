@@ -0,0 +1,51 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from app.pipelines.models.pipeline import Pipeline
+from app.pipelines.models.pipeline_run import PipelineRun
+from app.projects.models.project import Project
+from app.tables.models.table_storage import TableStorage
+
+
+def _run_pipeline(cwd: str, project_dir: str, run_id: str = None, full_run: bool = False) -> dict:
+    """
+    Executed in the workers; cwd is given because the projects are found from it (and a process does not share it)
+    The worker saves the tables (see TableStorage) and returns their catalog, so the tables do not go through the event loop
+    """
+    if os.getcwd() != cwd:
+        os.chdir(cwd)
+    run = PipelineRun(project_dir, run_id) if run_id else None
+    tables = asyncio.run(Pipeline(project_dir).run_pipeline(run=run, full_run=full_run))
+    project = Project.instantiate_from_dir(project_dir)
+    return TableStorage(project.path).save(tables, project.get_preview(full_run))
+
+
+class PipelinePool:
+    """
+    Runs the pipelines outside of the event loop, so that the app stays responsive during long runs
+      * SQUIRREL_POOL_MODE: 'process' (default) or 'thread'
+      * SQUIRREL_POOL_WORKERS: maximum number of pipelines running at the same time (default 2)
+    """
+    _executor = None
+
+    @classmethod
+    def _get_executor(cls):
+        if cls._executor is None:
+            max_workers = int(os.environ.get("SQUIRREL_POOL_WORKERS", 2))
+            if os.environ.get("SQUIRREL_POOL_MODE", "process") == "thread":
+                cls._executor = ThreadPoolExecutor(max_workers=max_workers)
+            else:
+                cls._executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+        return cls._executor
+
+    @classmethod
+    async def run_pipeline(cls, project_dir: str, run_id: str = None, full_run: bool = False) -> dict:
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(cls._get_executor(), _run_pipeline, os.getcwd(), project_dir, run_id, full_run)
+        except BrokenProcessPool:
+            cls._executor = None
+            raise Exception("The pipeline worker stopped unexpectedly (e.g. out of memory), please retry")
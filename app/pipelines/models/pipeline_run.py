@@ -0,0 +1,58 @@
+import json
+import os
+import re
+import time
+import uuid
+
+
+class PipelineRunCancelled(Exception):
+    pass
+
+
+class PipelineRun:
+    """
+    A pipeline run followed through files (in the project 'runs' directory)
+    so that it can be monitored or cancelled from any process (the run itself being in a worker)
+    """
+    END_EVENTS = ("done", "error", "cancelled")
+
+    def __init__(self, project_dir: str, run_id: str = None):
+        """Raises ValueError if run_id is not one of a run (the files of the run are named after it)"""
+        if run_id is not None and not re.fullmatch("[0-9a-f]{32}", run_id):
+            raise ValueError(f"Invalid run id: {run_id}")
+        self.project_dir = project_dir
+        self.run_id = run_id or uuid.uuid4().hex
+        self.path = os.path.join(os.getcwd(), "_projects", project_dir, "runs")
+        self.events_path = os.path.join(self.path, f"{self.run_id}.jsonl")
+        self.cancel_path = os.path.join(self.path, f"{self.run_id}.cancel")
+        self.start_time = time.time()
+
+    def add_event(self, event_type: str, **data):
+        os.makedirs(self.path, exist_ok=True)
+        event = {"type": event_type, "elapsed": round(time.time() - self.start_time, 3), **data}
+        with open(self.events_path, 'a') as f:
+            f.write(json.dumps(event) + "\n")
+
+    def get_events(self, start: int = 0) -> list[dict]:
+        try:
+            with open(self.events_path, 'r') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return []
+        return [json.loads(line) for line in lines[start:] if line.endswith("\n")]
+
+    def remove_old_runs(self, max_age: int = 24 * 3600):
+        if not os.path.exists(self.path):
+            return
+        for file_name in os.listdir(self.path):
+            file_path = os.path.join(self.path, file_name)
+            if time.time() - os.path.getmtime(file_path) > max_age:
+                os.remove(file_path)
+
+    def cancel(self):
+        os.makedirs(self.path, exist_ok=True)
+        open(self.cancel_path, 'w').close()
+
+    def check_cancelled(self):
+        if os.path.exists(self.cancel_path):
+            raise PipelineRunCancelled("Pipeline run cancelled")
@@ -0,0 +1,67 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+class PipelineScheduler:
+    """
+    Runs the pipeline actions following the dependencies between the tables they read/write
+      * Actions not touching the same tables run at the same time (in a thread pool)
+      * Actions reading/writing unknown tables (e.g. CustomAction) wait for all previous actions, and all next actions wait for them
+      * With one worker (the default of the project settings), the actions run one after the other in the event loop
+    """
+    def __init__(self, actions, max_workers: int = 1):
+        self.actions = actions
+        self.max_workers = max(1, int(max_workers))
+
+    @staticmethod
+    def get_dependencies(actions) -> list[set[int]]:
+        """Returns, for each action, the indexes of the previous actions that must be executed before it"""
+        accessed_tables = [(a.action.get_input_tables(), a.action.get_output_tables()) for a in actions]
+        dependencies = []
+        for idx, (reads, writes) in enumerate(accessed_tables):
+            action_dependencies = set()
+            for previous_idx, (previous_reads, previous_writes) in enumerate(accessed_tables[:idx]):
+                if None in (reads, writes, previous_reads, previous_writes) \
+                        or writes & (previous_reads | previous_writes) \
+                        or reads & previous_writes:
+                    action_dependencies.add(previous_idx)
+            dependencies.append(action_dependencies)
+        return dependencies
+
+    async def run(self, run_action, on_action_done=None, start_idx: int = 0):
+        """
+        run_action(idx) must return the coroutine executing the action, it is run in a worker thread (with several workers)
+        on_action_done(idx, result) is called (in the event loop) each time an action is completed
+        """
+        if self.max_workers == 1:
+            for idx in range(start_idx, len(self.actions)):
+                result = await run_action(idx)
+                if on_action_done:
+                    on_action_done(idx, result)
+            return
+        loop = asyncio.get_running_loop()
+        dependencies = self.get_dependencies(self.actions)
+        remaining = {idx: dependencies[idx] - set(range(start_idx)) for idx in range(start_idx, len(self.actions))}
+        running = {}
+        error = None
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while (remaining and not error) or running:
+                ready = sorted(idx for idx, deps in remaining.items() if not deps)
+                for idx in ready[:self.max_workers - len(running)] if not error else []:
+                    del remaining[idx]
+                    future = loop.run_in_executor(executor, asyncio.run, run_action(idx))
+                    running[future] = idx
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for future in sorted(done, key=running.get):
+                    idx = running.pop(future)
+                    if future.exception():
+                        error = error or future.exception()
+                        continue
+                    for deps in remaining.values():
+                        deps.discard(idx)
+                    if on_action_done:
+                        on_action_done(idx, future.result())
+
+        if error:
+            raise error
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+
+try:
+    import polars as pl
+    POLARS_AVAILABLE = True
+except ImportError:
+    POLARS_AVAILABLE = False
+
+POLARS_AGGREGATIONS = {
+    "sum": "sum", "mean": "mean", "median": "median", "min": "min", "max": "max",
+    "std": "std", "var": "var", "count": "count", "nunique": "n_unique",
+}
+POLARS_STRING_OPERATIONS = {
+    "upper": lambda s: s.str.to_uppercase(),
+    "lower": lambda s: s.str.to_lowercase(),
+    "strip": lambda s: s.str.strip_chars(),
+    "lstrip": lambda s: s.str.strip_chars_start(),
+    "rstrip": lambda s: s.str.strip_chars_end(),
+}
+
+
+class UnsupportedOperation(Exception):
+    """The operation can not be executed by polars with the same result as pandas, it has to be executed by pandas"""
+
+
+def _to_polars(data):
+    try:
+        return pl.from_pandas(data)
+    except Exception as e:
+        raise UnsupportedOperation(str(e))
+
+
+def _is_numeric(column: pd.Series) -> bool:
+    return pd.api.types.is_numeric_dtype(column) and not pd.api.types.is_bool_dtype(column)
+
+
+def get_unique_positions(table: pd.DataFrame, subset: list, keep) -> np.ndarray:
+    """Positions of the rows kept by table.drop_duplicates(subset, keep)"""
+    subset = list(subset or table.columns)
+    if not all(isinstance(col, str) for col in subset) or table.columns.has_duplicates:
+        raise UnsupportedOperation("Only named columns are supported")
+    df = _to_polars(table[subset]).with_row_index("sq_row_position")
+    unique_df = df.unique(subset=subset, keep={"first": "first", "last": "last", False: "none"}[keep], maintain_order=True)
+    return np.sort(unique_df["sq_row_position"].to_numpy())
+
+
+def merge(left: pd.DataFrame, right: pd.DataFrame, on: str, how: str) -> pd.DataFrame:
+    """Same as pd.merge(left, right, on=on, how=how), the rows are matched by polars and taken by pandas (keeping the dtypes)"""
+    if how not in ("inner", "left") or left[on].dtype != right[on].dtype:
+        raise UnsupportedOperation("Only inner/left merges on keys of the same type are supported")
+    left_keys = _to_polars(left[[on]]).with_row_index("sq_left_position")
+    right_keys = _to_polars(right[[on]]).with_row_index("sq_right_position")
+    positions = left_keys.join(right_keys, on=on, how=how, nulls_equal=True, maintain_order="left_right")
+
+    right_columns = [col for col in right.columns if col != on]
+    common_columns = set(right_columns) & set(left.columns)
+    left_part = left.iloc[positions["sq_left_position"].to_numpy()].reset_index(drop=True)
+    right_part = right[right_columns].reset_index(drop=True).reindex(positions["sq_right_position"].fill_null(-1).to_numpy())
+    left_part = left_part.rename(columns={col: f"{col}_x" for col in common_columns})
+    right_part = right_part.rename(columns={col: f"{col}_y" for col in common_columns})
+    return pd.concat([left_part, right_part.reset_index(drop=True)], axis=1)
+
+
+def group_by(table: pd.DataFrame, by, agg: dict) -> pd.DataFrame:
+    """Same as table.groupby(by).agg(agg).reset_index()"""
+    by = [by] if isinstance(by, str) else list(by)
+    if not agg or not all(isinstance(func, str) and func in POLARS_AGGREGATIONS for func in agg.values()) \
+            or set(by) & set(agg):
+        raise UnsupportedOperation("Only single aggregation functions by column are supported")
+    if not all(func in ("count", "nunique") or _is_numeric(table[col]) for col, func in agg.items()):
+        raise UnsupportedOperation("Only count and nunique are supported on non numeric columns")
+    df = _to_polars(table[by + list(agg)]).drop_nulls(subset=by)
+    expressions = [
+        pl.col(col).drop_nulls().n_unique() if func == "nunique" else getattr(pl.col(col), POLARS_AGGREGATIONS[func])()
+        for col, func in agg.items()
+    ]
+    try:
+        result = df.group_by(by).agg(expressions).sort(by).to_pandas()
+    except Exception as e:
+        raise UnsupportedOperation(str(e))
+
+    for col in by + [col for col, func in agg.items() if func in ("min", "max")]:
+        result[col] = result[col].astype(table[col].dtype)
+    for col in [col for col, func in agg.items() if func in ("count", "nunique")]:
+        result[col] = result[col].astype("int64")
+    return result
+
+
+def string_operation(series: pd.Series, operation: str, pattern: str = None, replacement: str = None) -> pd.Series:
+    """Same as series.str.<operation>(), or series.str.replace(pattern, replacement, regex=True) for 'replace'"""
+    polars_series = _to_polars(series)
+    if polars_series.dtype != pl.String:
+        raise UnsupportedOperation("Only string columns are supported")
+    if operation == "replace":
+        if replacement is None or "$" in replacement or "\\" in replacement:
+            raise UnsupportedOperation("Replacement with group references are not supported")
+        try:
+            result = polars_series.str.replace_all(pattern, replacement)
+        except Exception as e:
+            raise UnsupportedOperation(str(e))
+    elif operation in POLARS_STRING_OPERATIONS:
+        result = POLARS_STRING_OPERATIONS[operation](polars_series)
+    else:
+        raise UnsupportedOperation(f"String operation {operation} is not supported")
+    return result.to_pandas().set_axis(series.index).rename(series.name).astype(series.dtype)
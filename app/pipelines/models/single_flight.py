@@ -0,0 +1,89 @@
+import asyncio
+import os
+import socket
+import time
+
+
+class SingleFlight:
+    """
+    Concurrent executions for the same key are done once
+      * In a process, the callers await the task of the first one
+      * Across processes (e.g. uvicorn workers), the execution holds a lock file (created with O_EXCL),
+        the other processes wait for its release and then reuse the result (see get_other_result) or execute themselves
+      * A lock file is stale (and ignored) if its process is not running anymore or if it is older than STALE_AFTER seconds
+    """
+    POLL_INTERVAL = 0.1
+    STALE_AFTER = 6 * 3600
+    _tasks = {}
+
+    @classmethod
+    async def run(cls, key, lock_path: str, execute, get_other_result=None, share: bool = True):
+        """
+        execute: coroutine function doing the execution
+        get_other_result(wait_start): result of an execution done by another process (since wait_start), None if there is not
+        share: if False, the callers in the process do not share this execution (but it still holds the lock)
+        """
+        if not share:
+            return await cls._run_locked(lock_path, execute, get_other_result)
+        task_key = (id(asyncio.get_running_loop()), key)
+        task = cls._tasks.get(task_key)
+        if task is None:
+            task = asyncio.ensure_future(cls._run_locked(lock_path, execute, get_other_result))
+            cls._tasks[task_key] = task
+            task.add_done_callback(lambda _: cls._tasks.pop(task_key, None))
+        return await asyncio.shield(task)
+
+    @classmethod
+    async def _run_locked(cls, lock_path, execute, get_other_result):
+        while True:
+            wait_start = time.time()
+            if cls._acquire(lock_path):
+                try:
+                    return await execute()
+                finally:
+                    cls._release(lock_path)
+            while os.path.exists(lock_path) and not cls._is_stale(lock_path):
+                await asyncio.sleep(cls.POLL_INTERVAL)
+            result = get_other_result(wait_start) if get_other_result else None
+            if result is not None:
+                return result
+
+    @classmethod
+    def _acquire(cls, lock_path) -> bool:
+        if os.path.exists(lock_path) and cls._is_stale(lock_path):
+            cls._release(lock_path)
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, 'w') as f:
+            f.write(f"{os.getpid()} {socket.gethostname()}")
+        return True
+
+    @staticmethod
+    def _release(lock_path):
+        try:
+            os.remove(lock_path)
+        except FileNotFoundError:
+            pass
+
+    @classmethod
+    def _is_stale(cls, lock_path) -> bool:
+        try:
+            with open(lock_path, 'r') as f:
+                pid, hostname = f.read().split(" ", 1)
+            if time.time() - os.path.getmtime(lock_path) > cls.STALE_AFTER:
+                return True
+        except FileNotFoundError:
+            return False
+        except ValueError:
+            return False  # Being written
+        if hostname != socket.gethostname():
+            return False
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return True
+        except (PermissionError, ValueError):
+            pass
+        return False
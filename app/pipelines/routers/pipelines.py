@@ -1,10 +1,17 @@
+import asyncio
+import json
+
 from fastapi import Request
-from fastapi.responses import JSONResponse, RedirectResponse
+from fastapi.responses import JSONResponse, RedirectResponse, StreamingResponse
 
 from app import router, templates
 from app.pipelines.models.pipeline import Pipeline
+from app.pipelines.models.pipeline_run import PipelineRun
+from app.tables.models.table_manager import TableManager
 from app.utils.form_utils import squirrel_error
 
+_running_jobs = set()  # Keeps a reference to the background runs (else they can be garbage collected)
+
 
 @router.get("/pipeline/")
 @squirrel_error
@@ -25,6 +32,12 @@ async def confirm_new_order(request: Request, project_dir: str, order: str):
     pipeline.confirm_new_order(order)
     return JSONResponse(content={"message": "Order changed successfully"}, status_code=200)
 
+@router.get("/pipeline/plan/")
+@squirrel_error
+async def get_execution_plan(request: Request, project_dir: str):
+    pipeline = Pipeline(project_dir)
+    return pipeline.get_execution_plan()
+
 @router.post("/pipeline/edit_action/")
 @squirrel_error
 async def edit_action(request: Request):
@@ -71,3 +84,43 @@ async def edit_pipeline_action(request: Request):
     pipeline.edit_pipeline_action(action_id, info_data)
 
     return RedirectResponse(url=f"/pipeline?project_dir={project_dir}", status_code=303)
+
+@router.post("/pipeline/run/start/")
+@squirrel_error
+async def start_pipeline_run(request: Request, project_dir: str):
+    run = PipelineRun(project_dir)
+    run.remove_old_runs()
+    job = asyncio.create_task(TableManager.run_pipeline_job(project_dir, run))
+    _running_jobs.add(job)
+    job.add_done_callback(_running_jobs.discard)
+    return JSONResponse(content={"run_id": run.run_id}, status_code=200)
+
+@router.get("/pipeline/run/progress/")
+async def pipeline_run_progress(request: Request, project_dir: str, run_id: str):
+    """Server-Sent Events stream of the run events (see PipelineRun), ends with the run"""
+    try:
+        run = PipelineRun(project_dir, run_id)
+    except ValueError as e:
+        return JSONResponse(content={"message": str(e)}, status_code=400)
+
+    async def event_stream():
+        sent_events = 0
+        while not await request.is_disconnected():
+            events = run.get_events(start=sent_events)
+            sent_events += len(events)
+            for event in events:
+                yield f"data: {json.dumps(event)}\n\n"
+            if any(event["type"] in PipelineRun.END_EVENTS for event in events):
+                break
+            await asyncio.sleep(0.25)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+@router.post("/pipeline/run/cancel/")
+async def cancel_pipeline_run(request: Request, project_dir: str, run_id: str):
+    try:
+        run = PipelineRun(project_dir, run_id)
+    except ValueError as e:
+        return JSONResponse(content={"message": str(e)}, status_code=400)
+    run.cancel()
+    return JSONResponse(content={"message": "Pipeline run will stop after the running action(s)"}, status_code=200)
@@ -0,0 +1,54 @@
+function setActionRunStatus(actionIdx, text, className) {
+    const statusElement = document.getElementById(`action-run-status-${actionIdx}`);
+    if (!statusElement) return;
+    statusElement.textContent = text;
+    statusElement.className = `action-run-status ${className}`;
+}
+
+function setRunButtons(isRunning, projectDir, runId) {
+    const runButton = document.getElementById('run-pipeline');
+    const cancelButton = document.getElementById('cancel-pipeline-run');
+    runButton.disabled = isRunning;
+    cancelButton.style.display = isRunning ? 'inline-block' : 'none';
+    cancelButton.onclick = isRunning ? () => cancelPipelineRun(projectDir, runId) : null;
+}
+
+function followPipelineRun(projectDir, runId) {
+    setRunButtons(true, projectDir, runId);
+    const source = new EventSource(`/pipeline/run/progress/?project_dir=${projectDir}&run_id=${runId}`);
+    source.onmessage = function(message) {
+        const event = JSON.parse(message.data);
+        if (event.type === 'action_start') {
+            setActionRunStatus(event.idx, 'Running...', 'running');
+        } else if (event.type === 'action_done') {
+            setActionRunStatus(event.idx, event.summary, 'done');
+        } else if (event.type === 'done') {
+            source.close();
+            window.location.href = `/tables/?project_dir=${projectDir}&lazy=true`;  // The tables saved by the run
+        } else if (event.type === 'error' || event.type === 'cancelled') {
+            source.close();
+            setRunButtons(false);
+            window.showNotification(event.message || 'Pipeline run cancelled', event.type === 'error' ? 'error' : 'warning');
+        }
+    };
+    source.onerror = function() {
+        source.close();
+        setRunButtons(false);
+    };
+}
+
+export function runPipeline(projectDir) {
+    document.querySelectorAll('.action-run-status:not(.skipped)').forEach(element => {
+        element.textContent = '';
+        element.className = 'action-run-status';
+    });
+    fetch(`/pipeline/run/start/?project_dir=${projectDir}`, { method: 'POST' })
+        .then(response => response.json())
+        .then(data => followPipelineRun(projectDir, data.run_id))
+        .catch(error => window.showNotification(error.message, 'error'));
+}
+
+function cancelPipelineRun(projectDir, runId) {
+    fetch(`/pipeline/run/cancel/?project_dir=${projectDir}&run_id=${runId}`, { method: 'POST' })
+        .then(response => window.handleRedirectNotification(response));
+}
@@ -1,5 +1,6 @@
 import { EditActionModal } from './edit_action_modal.js';
 import { EditPipelineActionModal } from './edit_pipeline_action_modal.js';
+import { runPipeline } from './pipeline_run.js';
 
 function editActionOpenModal(actionId, actionName, actionError='') {
     const actionModal = new EditActionModal(actionId, actionName, actionError);
@@ -65,3 +66,4 @@ document.addEventListener('DOMContentLoaded', function() {
 window.editActionOpenModal = editActionOpenModal;
 window.editPipelineActionOpenModal = editPipelineActionOpenModal;
 window.confirmNewOrder = confirmNewOrder;
+window.runPipeline = runPipeline;
@@ -5,6 +5,20 @@ import pickle
 from app.data_sources.models.data_source_factory import DataSourceFactory
 
 
+MISC_DEFAULTS = {
+    "table_len": 10,
+    "action_cache_mb": 0,
+    "parallel_workers": 1,
+    "lazy_mode": False,
+    "backend": "pandas",
+    "preview_rows": 0,
+    "preview_sampling": "head",
+    "chunk_rows": 0,
+    "memory_budget_mb": 0,
+    "compact_dtypes": False,
+    "profile_memory": False,
+}
+
 PROJECT_TYPE_REGISTRY = {}
 def project_type(cls):
     """
@@ -21,10 +35,17 @@ class Project:
 
     def get_available_projects(all_projects_path: str) -> list['Project']:
         projects = []
-        for project in os.listdir(all_projects_path):
+        for project in Project.get_project_dirs(all_projects_path):
             projects.append(Project.instantiate_from_dir(project))
         return projects
 
+    def get_project_dirs(all_projects_path: str) -> list[str]:
+        """Directories holding a project manifest (other entries, e.g. stray files, are ignored)"""
+        return sorted(
+            project_dir for project_dir in os.listdir(all_projects_path)
+            if os.path.isfile(os.path.join(all_projects_path, project_dir, "__manifest__.json"))
+        )
+
     def _instantiate_from_path(project_path: str) -> 'Project':
         manifest_path = os.path.join(project_path, "__manifest__.json")
         with open(manifest_path, 'r') as file:
@@ -55,10 +76,16 @@ class Project:
             json.dump(data, file, indent=4)
 
     def _create_misc(self, misc: dict) -> dict:
-        if "table_len" not in misc:
-            misc["table_len"] = 10
+        for key, default_value in MISC_DEFAULTS.items():
+            misc.setdefault(key, default_value)
         return misc
 
+    def get_preview(self, full_run: bool = False):
+        """Sampling of the data sources for preview runs (see DataSource.create_table), None for a run on the full data"""
+        if full_run or not self.misc.get("preview_rows"):
+            return None
+        return {"rows": int(self.misc["preview_rows"]), "sampling": self.misc.get("preview_sampling", "head")}
+
     async def create(self):
         self._create_project_directory()
         self._create_manifest()
@@ -1,5 +1,7 @@
 import pandas as pd
 
+from .table_html import iter_table_html, render_table_html
+
 def convert_col_idx(col_idx):
     """Returns the idx of a pandas dataframe column"""
     if col_idx[0] != '(':
@@ -7,36 +9,53 @@ def convert_col_idx(col_idx):
     return col_idx
 
 class Table:
-    def __init__(self, name: str, content: pd.DataFrame):
+    def __init__(self, name: str, content: pd.DataFrame = None, storage=None, entry: dict = None):
+        """The content is either given, or loaded on access from the entry of a TableStorage catalog"""
         self.name = name
-        self.content = content
+        self._content = content
+        self.storage = storage
+        self.entry = entry
+        self._first_pages = {}  # display_len: html
 
-    def _to_html_with_idx(df):
-        html = df.to_html(classes='df-table', index=False)
-        
-        header_html = ""
-        for idx, col_id in enumerate(df.columns):
-            if isinstance(df.columns, pd.MultiIndex):
-                header_html += f"""<th data-columnidx="{df.columns[idx]}">{df.columns[idx][-1]}</th>\n"""
-            else:
-                header_html += f"""<th data-columnidx="{df.columns[idx]}">{df.columns[idx]}</th>\n"""
+    @property
+    def content(self) -> pd.DataFrame:
+        if self._content is None:
+            return self.storage.load_table(self.entry)
+        return self._content
+
+    def get_len(self) -> int:
+        return len(self._content.index) if self._content is not None else self.entry["rows"]
+
+    def read_rows(self, start: int, stop: int, columns: list[int] = None) -> pd.DataFrame:
+        """
+        Rows [start, stop) of the content, read from the saved table when the content is not loaded
+        columns: positions of the columns to read, all if None
+        """
+        if self._content is None:
+            return self.storage.read_rows(self.entry, start, stop, columns)
+        rows = self._content.iloc[start:stop]
+        return rows if columns is None else rows.iloc[:, columns]
 
-        header_start = html.find('<thead>')
-        header_end = html.find('</thead>')
-        header_rows = html[header_start:header_end]
-        modified_header = header_rows.rsplit('<tr', 1)
-        modified_header = f"{modified_header[0]}<tr>{header_html}</tr>"
-        return html[:header_start] + modified_header + html[header_end:]
-    
-    def to_html(self, display_len, page=False, n=False):
+    def get_columns(self) -> list:
+        return list(self._content.columns) if self._content is not None else self.entry["columns"]
+
+    def _get_displayed_rows(self, display_len, page=False, n=False) -> pd.DataFrame:
         if page and n:
             start = page * n
-            end = start + n
-            df = self.content.iloc[start:end]
-        else:
-            df = self.content.head(display_len)
-        return Table._to_html_with_idx(df)
-    
+            return self.read_rows(start, start + n)
+        return self.read_rows(0, display_len)
+
+    def to_html(self, display_len, page=False, n=False) -> str:
+        return render_table_html(self._get_displayed_rows(display_len, page, n))
+
+    def iter_html(self, display_len, page=False, n=False):
+        """HTML of to_html by chunks, for a streaming response (the first page is rendered once)"""
+        if not (page and n):
+            if display_len not in self._first_pages:
+                self._first_pages[display_len] = self.to_html(display_len)
+            return iter([self._first_pages[display_len]])
+        return iter_table_html(self._get_displayed_rows(display_len, page, n))
+
     def get_col_info(self, column_idx: str):
         df = self.content
         column = df[eval(convert_col_idx(column_idx))]
@@ -46,7 +65,7 @@ class Table:
             "unique": str(column.nunique()),
             "null": str(column.isna().sum()),
             "count": str(len(column.index)),
-            "is_numeric": column.dtype in ["float64", "int64"],
+            "is_numeric": pd.api.types.is_numeric_dtype(column) and not pd.api.types.is_bool_dtype(column),
             "is_string": column.dtype == "object" or isinstance(column.dtype, pd.StringDtype),
             "top_values": column.value_counts().head(5).to_dict()
         }
@@ -0,0 +1,75 @@
+import html
+import math
+import numpy as np
+import pandas as pd
+
+from pandas.io.formats.format import format_array
+
+ROWS_PER_CHUNK = 1000
+
+
+def _format_floats(column: pd.Series) -> list[str]:
+    """Cells of the float column, formatted as DataFrame.to_html does (same precision for the whole column)"""
+    cells = [cell.strip() for cell in format_array(column._values, None, na_rep="NaN", leading_space=False)]
+    return cells if isinstance(column.dtype, np.dtype) else [html.escape(cell, quote=False) for cell in cells]
+
+
+def _format_value(value) -> str:
+    if isinstance(value, float) and math.isnan(value):
+        return "NaN"
+    return html.escape(str(value), quote=False)
+
+
+def _format_column(column: pd.Series) -> list[str]:
+    """Cells of the column, escaped"""
+    dtype = column.dtype
+    if isinstance(dtype, np.dtype):
+        if dtype.kind in "biu":
+            return [str(value) for value in column.tolist()]
+        if dtype.kind in "mM":
+            return column.astype(str).fillna("NaT").tolist()
+    return [_format_value(value) for value in column.tolist()]
+
+
+def _iter_header(columns: pd.Index):
+    yield '<thead>\n'
+    if isinstance(columns, pd.MultiIndex):
+        for level in range(columns.nlevels - 1):
+            yield '<tr>'
+            labels = [col_idx[level] for col_idx in columns]
+            start = 0
+            for idx in range(1, len(labels) + 1):
+                if idx == len(labels) or labels[idx] != labels[start] or columns[idx][:level] != columns[start][:level]:
+                    colspan = f' colspan="{idx - start}" halign="left"' if idx - start > 1 else ''
+                    yield f'<th{colspan}>{html.escape(str(labels[start]), quote=False)}</th>'
+                    start = idx
+            yield '</tr>\n'
+    yield '<tr>'
+    for col_idx in columns:
+        label = col_idx[-1] if isinstance(columns, pd.MultiIndex) else col_idx
+        yield f'<th data-columnidx="{html.escape(str(col_idx))}">{html.escape(str(label), quote=False)}</th>'
+    yield '</tr>\n</thead>\n'
+
+
+def iter_table_html(df: pd.DataFrame, rows_per_chunk: int = ROWS_PER_CHUNK):
+    """
+    HTML of the table (without index) by chunks of rows, each chunk is formatted column by column
+      * The header cells hold the column index (data-columnidx), the last level only for MultiIndex columns
+      * The float columns are formatted at once, as their precision depends on all their values
+    """
+    yield '<table border="1" class="dataframe df-table">\n'
+    yield "".join(_iter_header(df.columns))
+    yield '<tbody>\n'
+    float_columns = {idx: _format_floats(column) for idx, (_, column) in enumerate(df.items()) if pd.api.types.is_float_dtype(column.dtype)}
+    for start in range(0, len(df.index), rows_per_chunk):
+        chunk = df.iloc[start:start + rows_per_chunk]
+        columns = [
+            float_columns[idx][start:start + rows_per_chunk] if idx in float_columns else _format_column(column)
+            for idx, (_, column) in enumerate(chunk.items())
+        ]
+        yield "".join(f'<tr><td>{"</td><td>".join(row)}</td></tr>\n' for row in zip(*columns))
+    yield '</tbody>\n</table>'
+
+
+def render_table_html(df: pd.DataFrame) -> str:
+    return "".join(iter_table_html(df))
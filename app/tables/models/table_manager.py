@@ -1,43 +1,88 @@
 import os
 import pandas as pd
-import pickle
 
 from .table import Table
-from app.pipelines.models.pipeline import Pipeline
+from .table_storage import TableStorage
+from app.pipelines.models.pipeline_pool import PipelinePool
+from app.pipelines.models.pipeline_run import PipelineRun, PipelineRunCancelled
+from app.pipelines.models.single_flight import SingleFlight
 from app.projects.models.project import Project
+from app.utils.object_cache import ObjectCache
 
 class TableManager:
-    def __init__(self, tables: dict[str, pd.DataFrame], project_dir: str):
+    preview = None
+
+    def __init__(self, tables: dict[str, pd.DataFrame], project_dir: str, preview: dict = None):
         self.project_dir = project_dir
         self.project = Project.instantiate_from_dir(project_dir)
+        self.preview = preview
         self.tables = self._create_tables(tables)
         self.display_len = self._get_project_display_len()
 
     @classmethod
-    async def init_from_project_dir(cls, project_dir: str, lazy: bool = False):
+    async def init_from_project_dir(cls, project_dir: str, lazy: bool = False, full_run: bool = False):
         table_manager = False
         if lazy:
             table_manager = cls._load_table_manager_from_file(project_dir)
         if not table_manager:
-            table_manager = await cls._load_table_manager_from_pipeline_run(project_dir)
+            table_manager = await cls._load_table_manager_from_pipeline_run(project_dir, full_run=full_run)
         return table_manager
 
-    @staticmethod
-    def _load_table_manager_from_file(project_dir):
-        datatables_path = os.path.join(os.getcwd(), "_projects", project_dir, "data_tables.pkl")
+    @classmethod
+    def _load_table_manager_from_file(cls, project_dir):
+        """Table manager of the saved tables (see TableStorage), their content is loaded on access"""
+        storage = TableStorage(os.path.join(os.getcwd(), "_projects", project_dir))
         try:
-            with open(datatables_path, 'rb') as f:
-                return pickle.load(f)
+            table_manager = ObjectCache.load(storage.catalog_path, lambda _: cls._init_from_storage(project_dir, storage))
         except FileNotFoundError:
             return False
+        table_manager.display_len = table_manager._get_project_display_len()  # The settings may have changed since it was cached
+        return table_manager
+
+    @classmethod
+    def _init_from_storage(cls, project_dir, storage):
+        catalog = storage.read_catalog()
+        table_manager = cls({}, project_dir, catalog["preview"])
+        table_manager.tables = {
+            table_name: Table(table_name, storage=storage, entry=entry)
+            for table_name, entry in catalog["tables"].items()
+        }
+        return table_manager
     
     @staticmethod
-    async def _load_table_manager_from_pipeline_run(project_dir):
-        pipeline = Pipeline(project_dir)
-        tables = await pipeline.run_pipeline()
-        table_manager = TableManager(tables, project_dir)
-        table_manager._save_tables()
-        return table_manager
+    async def _load_table_manager_from_pipeline_run(project_dir, run_id=None, full_run=False):
+        """
+        Concurrent runs of a project are done once (see SingleFlight), even across workers
+          * The requests without run_id share the run in progress, the ones with a run_id wait for it and run again
+          * Another worker's run is reused if it saved the tables with the same preview
+        """
+        project = Project.instantiate_from_dir(project_dir)
+        preview = project.get_preview(full_run)
+
+        async def execute():
+            await PipelinePool.run_pipeline(project_dir, run_id, full_run)  # The worker saves the tables
+            return TableManager._load_table_manager_from_file(project_dir)
+
+        def get_other_result(wait_start):
+            catalog_path = TableStorage(project.path).catalog_path
+            if not os.path.exists(catalog_path) or os.path.getmtime(catalog_path) < wait_start:
+                return None
+            table_manager = TableManager._load_table_manager_from_file(project_dir)
+            return table_manager if table_manager and table_manager.preview == preview else None
+
+        lock_path = os.path.join(project.path, "pipeline_run.lock")
+        return await SingleFlight.run((project_dir, repr(preview)), lock_path, execute, get_other_result, share=run_id is None)
+
+    @classmethod
+    async def run_pipeline_job(cls, project_dir: str, run: PipelineRun, full_run: bool = True):
+        """Runs the pipeline and saves its tables, the outcome is reported to run (see PipelineRun)"""
+        try:
+            await cls._load_table_manager_from_pipeline_run(project_dir, run.run_id, full_run)
+            run.add_event("done")
+        except PipelineRunCancelled:
+            run.add_event("cancelled")
+        except Exception as e:
+            run.add_event("error", message=str(e))
 
     def _create_tables(self, tables: dict):
         all_tables = {}
@@ -51,20 +96,20 @@ class TableManager:
         return display_len
 
     def _save_tables(self):
-        datatables_path = os.path.join(self.project.path, "data_tables.pkl")
-        with open(datatables_path, 'wb') as f:
-            pickle.dump(self, f)
+        TableStorage(self.project.path).save({name: table.content for name, table in self.tables.items()}, self.preview)
 
     def to_html(self, page=False, n=False):
         table_html = {}
-        table_len_infos = {}
         for table_name, table in self.tables.items():
             table_html[table_name] = table.to_html(display_len=self.display_len, page=page, n=n)
-            table_len_infos[table_name] = {
-                'total_len': len(table.content.index),
-                'display_len': self.display_len
-            }
-        return table_html, table_len_infos
+        return table_html, self.get_len_infos()
+
+    def get_len_infos(self) -> dict:
+        """Number of rows of each table and of its pages, without rendering them (see Table.iter_html)"""
+        return {
+            table_name: {'total_len': table.get_len(), 'display_len': self.display_len}
+            for table_name, table in self.tables.items()
+        }
 
     def get_col_info(self, table_name: str, column_idx: str):
         table = self.tables.get(table_name)
@@ -80,5 +125,5 @@ class TableManager:
     def get_autocomplete_data(self):
         autocomplete_data = {}
         for table_name, table in self.tables.items():
-            autocomplete_data[table_name] = list(table.content.columns)
+            autocomplete_data[table_name] = table.get_columns()
         return autocomplete_data
@@ -0,0 +1,53 @@
+import math
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+MAX_WINDOW_ROWS = 5000
+
+
+def _to_json_value(value):
+    if value is None or value is pd.NaT or value is pd.NA:
+        return None
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, (bool, int, str)):
+        return value
+    return str(value)
+
+
+def _get_json_values(column: pd.Series) -> list:
+    if isinstance(column.dtype, np.dtype) and column.dtype.kind in "mM":
+        return [value if isinstance(value, str) else None for value in column.astype(str).tolist()]
+    return [_to_json_value(value) for value in column.astype(object).tolist()]
+
+
+def rows_to_json(rows: pd.DataFrame, positions: list[int]) -> dict:
+    """
+    Columnar JSON of the rows: column descriptions and the values of each column (missing values are null)
+    positions: positions of the columns of rows in the table
+    """
+    columns = []
+    for position, col_idx, dtype in zip(positions, rows.columns, rows.dtypes):
+        label = col_idx[-1] if isinstance(rows.columns, pd.MultiIndex) else col_idx
+        columns.append({"position": position, "columnidx": str(col_idx), "name": str(label), "dtype": str(dtype)})
+    return {
+        "columns": columns,
+        "data": [_get_json_values(column) for _, column in rows.items()],
+    }
+
+
+def rows_to_arrow(rows: pd.DataFrame) -> bytes:
+    """Arrow IPC stream of the rows (requires pyarrow)"""
+    if pa is None:
+        raise Exception("The Arrow format requires pyarrow, please install it or use the JSON format")
+    arrow_rows = pa.Table.from_pandas(rows, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, arrow_rows.schema) as writer:
+        writer.write_table(arrow_rows)
+    return sink.getvalue().to_pybytes()
@@ -0,0 +1,171 @@
+import json
+import os
+import uuid
+import pandas as pd
+
+from app.utils.object_cache import ObjectCache, load_pickle
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+
+def _write_arrow(path: str, arrow_table):
+    with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, arrow_table.schema) as writer:
+        writer.write_table(arrow_table, max_chunksize=TableStorage.BATCH_ROWS)
+
+
+def _read_arrow(path: str) -> pd.DataFrame:
+    with pa.memory_map(path, 'r') as source:
+        return pa.ipc.open_file(source).read_all().to_pandas()
+
+
+def _read_arrow_rows(path: str, start: int, stop: int, batch_rows: int = None, columns: list[int] = None) -> pd.DataFrame:
+    """
+    Rows [start, stop) of the file, only the record batches holding them are converted (the others are not read)
+    batch_rows: rows of every record batch but the last one, to seek the first batch directly
+    columns: positions of the columns to convert, all if None
+    """
+    with pa.memory_map(path, 'r') as source:
+        reader = pa.ipc.open_file(source)
+        first_batch_idx = min(start // batch_rows, reader.num_record_batches) if batch_rows else 0
+        batches, batch_start = [], first_batch_idx * (batch_rows or 0)
+        for batch_idx in range(first_batch_idx, reader.num_record_batches):
+            batch = reader.get_batch(batch_idx)  # Zero-copy
+            batch_stop = batch_start + batch.num_rows
+            if batch_stop > start and batch_start < stop:
+                batches.append(batch.slice(max(start - batch_start, 0), min(stop, batch_stop) - max(start, batch_start)))
+            if batch_stop >= stop:
+                break
+            batch_start = batch_stop
+        rows = pa.Table.from_batches(batches, schema=reader.schema)
+        return (rows if columns is None else rows.select(columns)).to_pandas()
+
+
+def _to_arrow(table: pd.DataFrame) -> tuple:
+    """
+    Arrow table of the table and the infos to read it back the same (see _restore_object_dtypes),
+    None if it would not be read back the same (e.g. mixed types in a column, interval or period dtypes)
+    """
+    if pa is None or any(_is_pandas_only_dtype(dtype) for dtype in table.dtypes):
+        return None, None
+    try:
+        arrow_table = pa.Table.from_pandas(table)
+        object_infos = {
+            "object_columns": [
+                idx for idx, dtype in enumerate(table.dtypes)
+                if dtype == object and pa.types.is_string(arrow_table.schema.field(idx).type)
+            ],
+            "object_labels": table.columns.dtype == object and not isinstance(table.columns, pd.MultiIndex),
+        }
+        empty_table = _restore_object_dtypes(arrow_table.slice(0, 0).to_pandas(), object_infos)
+        pd.testing.assert_frame_equal(empty_table, table.iloc[:0])  # Same dtypes, columns and index
+    except (pa.ArrowException, ValueError, TypeError, AssertionError):
+        return None, None
+    return arrow_table, object_infos
+
+
+def _restore_object_dtypes(df: pd.DataFrame, entry: dict, columns: list[int] = None) -> pd.DataFrame:
+    """Object columns of strings and object column labels, read back as str by Arrow"""
+    object_columns = set(entry.get("object_columns", []))
+    for df_idx, position in enumerate(range(len(df.columns)) if columns is None else columns):
+        if position in object_columns:
+            df.isetitem(df_idx, df.iloc[:, df_idx].astype(object))
+    if entry.get("object_labels"):
+        df.columns = df.columns.astype(object)
+    return df
+
+
+def _is_pandas_only_dtype(dtype) -> bool:
+    """Dtypes stored as pandas extensions in Arrow, only readable where pandas registered them"""
+    if isinstance(dtype, pd.CategoricalDtype):
+        dtype = dtype.categories.dtype
+    return isinstance(dtype, (pd.IntervalDtype, pd.PeriodDtype))
+
+
+class TableStorage:
+    """
+    Tables of a pipeline run, saved one file per table with a JSON catalog (names, columns, dtypes, row counts, preview)
+      * Tables are saved in the Arrow IPC file format (memory-mapped when read),
+        or pickled if pyarrow is not installed or the table would not be read back the same (see _to_arrow)
+      * The catalog is replaced atomically, the files of the previous save are kept until the next one
+        (a reader may have loaded the previous catalog), older files are removed
+    """
+    BATCH_ROWS = 65536
+
+    def __init__(self, project_path: str):
+        self.path = os.path.join(project_path, "data_tables")
+        self.catalog_path = os.path.join(self.path, "catalog.json")
+
+    def read_catalog(self) -> dict:
+        """Raises FileNotFoundError if no tables were saved"""
+        with open(self.catalog_path, 'r') as f:
+            return json.load(f)
+
+    def save(self, tables: dict[str, pd.DataFrame], preview: dict = None) -> dict:
+        os.makedirs(self.path, exist_ok=True)
+        save_id = uuid.uuid4().hex[:8]
+        catalog = {"preview": preview, "tables": {}}
+        for idx, (table_name, table) in enumerate(tables.items()):
+            catalog["tables"][table_name] = self._save_table(table, f"{save_id}_{idx}")
+
+        try:
+            previous_catalog = self.read_catalog()
+        except (FileNotFoundError, ValueError):
+            previous_catalog = {"tables": {}}
+        tmp_catalog_path = f"{self.catalog_path}.{save_id}.tmp"
+        with open(tmp_catalog_path, 'w') as f:
+            json.dump(catalog, f, default=str)
+        os.replace(tmp_catalog_path, self.catalog_path)
+        self._remove_unused_files([catalog, previous_catalog])
+        legacy_path = os.path.join(os.path.dirname(self.path), "data_tables.pkl")  # Before the catalog
+        if os.path.exists(legacy_path):
+            os.remove(legacy_path)
+        return catalog
+
+    def _save_table(self, table: pd.DataFrame, file_id: str) -> dict:
+        entry = {
+            "rows": len(table.index),
+            "columns": list(table.columns),
+            "dtypes": [str(dtype) for dtype in table.dtypes],
+        }
+        arrow_table, object_infos = _to_arrow(table)
+        if arrow_table is not None:
+            entry.update(object_infos, file=f"{file_id}.arrow")
+            _write_arrow(os.path.join(self.path, entry["file"]), arrow_table)
+            if all(column.num_chunks <= 1 for column in arrow_table.columns):
+                entry["batch_rows"] = self.BATCH_ROWS  # The batches are cut at the chunks boundaries otherwise
+            return entry
+        entry["file"] = f"{file_id}.pkl"
+        table.to_pickle(os.path.join(self.path, entry["file"]))
+        return entry
+
+    def _remove_unused_files(self, catalogs: list[dict]):
+        used_files = {entry["file"] for catalog in catalogs for entry in catalog["tables"].values()}
+        for file_name in os.listdir(self.path):
+            if file_name not in used_files and not file_name.endswith((".json", ".tmp")):
+                try:
+                    os.remove(os.path.join(self.path, file_name))
+                except FileNotFoundError:
+                    pass
+
+    def get_table_path(self, entry: dict) -> str:
+        return os.path.join(self.path, entry["file"])
+
+    def load_table(self, entry: dict) -> pd.DataFrame:
+        """Content of the table of the catalog entry (kept in ObjectCache)"""
+        if not entry["file"].endswith(".arrow"):
+            return ObjectCache.load(self.get_table_path(entry), load_pickle)
+        return ObjectCache.load(self.get_table_path(entry), lambda path: _restore_object_dtypes(_read_arrow(path), entry))
+
+    def read_rows(self, entry: dict, start: int, stop: int, columns: list[int] = None) -> pd.DataFrame:
+        """
+        Rows [start, stop) of the table of the catalog entry, read from the memory-mapped file (not cached)
+        columns: positions of the columns to read, all if None
+        """
+        if not entry["file"].endswith(".arrow"):
+            rows = self.load_table(entry).iloc[start:stop]
+            return rows if columns is None else rows.iloc[:, columns]
+        rows = _read_arrow_rows(self.get_table_path(entry), start, stop, entry.get("batch_rows"), columns)
+        return _restore_object_dtypes(rows, entry, columns)
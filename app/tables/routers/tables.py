@@ -1,31 +1,71 @@
-from fastapi import Request
-from fastapi.responses import FileResponse, RedirectResponse
+import traceback
+
+from fastapi import Query, Request
+from fastapi.responses import FileResponse, JSONResponse, RedirectResponse, Response, StreamingResponse
 
 from app import router, templates
 from app.utils.form_utils import squirrel_error, squirrel_action_error, _get_form_data_info
 from app.pipelines.models.pipeline import Pipeline
 from app.pipelines.models.action_factory import ActionFactory
 from app.tables.models.table_manager import TableManager
+from app.tables.models.table_rows import ARROW_STREAM_MEDIA_TYPE, MAX_WINDOW_ROWS, rows_to_arrow, rows_to_json
 
 
 @router.get("/tables/")
 @squirrel_error
-async def tables(request: Request, project_dir: str):
-    table_manager = await TableManager.init_from_project_dir(project_dir)
-    table_html, table_len_infos = table_manager.to_html()
+async def tables(request: Request, project_dir: str, full_run: bool = False, lazy: bool = False):
+    """lazy: show the saved tables (e.g. after a run from the pipeline page) instead of running the pipeline"""
+    table_manager = await TableManager.init_from_project_dir(project_dir, lazy=lazy, full_run=full_run)
+    table_len_infos = table_manager.get_len_infos()  # The tables are rendered when opened (see /tables/pager/)
     sources = table_manager.project.get_sources()
     return templates.TemplateResponse(
         request,
         "tables/templates/tables.html",
-        {"table": table_html, "table_len_infos": table_len_infos, "project_dir": project_dir, "sources": sources}
+        {"table_len_infos": table_len_infos, "project_dir": project_dir, "sources": sources,
+         "preview": table_manager.preview}
     )
 
 @router.get("/tables/pager/")
 @squirrel_error
 async def tables_pager(request: Request, project_dir: str, table_name: str, page: int, n: int):
     table_manager = await TableManager.init_from_project_dir(project_dir, lazy=True)
-    table_html = table_manager.tables.get(table_name).to_html(table_manager.display_len, page=page, n=n)
-    return table_html
+    table_html = table_manager.tables.get(table_name).iter_html(table_manager.display_len, page=page, n=n)
+    return StreamingResponse(table_html, media_type="text/html")
+
+@router.get("/tables/rows/")
+async def tables_rows(request: Request, project_dir: str, table_name: str, start: int = 0, stop: int = 100,
+                      columns: str = None, output_format: str = Query("json", alias="format")):
+    """
+    Rows [start, stop) of a table as columnar JSON, or as an Arrow IPC stream (format=arrow), for virtual scrolling
+    columns: comma-separated positions of the columns, all if not given
+    Errors are returned as JSON ({"message": ...}), for the scripts fetching the rows
+    """
+    try:
+        return await _get_rows_response(project_dir, table_name, start, stop, columns, output_format)
+    except Exception as e:
+        traceback.print_exc()
+        return JSONResponse(content={"message": str(e)}, status_code=500)
+
+async def _get_rows_response(project_dir, table_name, start, stop, columns, output_format):
+    table_manager = await TableManager.init_from_project_dir(project_dir, lazy=True)
+    table = table_manager.tables.get(table_name)
+    if table is None:
+        return JSONResponse(content={"message": f"Table {table_name} does not exist"}, status_code=404)
+
+    total_len = table.get_len()
+    start = min(max(start, 0), total_len)
+    stop = min(max(stop, start), start + MAX_WINDOW_ROWS, total_len)
+    try:
+        positions = [int(position) for position in columns.split(",")] if columns else list(range(len(table.get_columns())))
+        rows = table.read_rows(start, stop, positions if columns else None)
+    except (ValueError, IndexError) as e:
+        return JSONResponse(content={"message": f"Invalid columns: {e}"}, status_code=400)
+
+    if output_format == "arrow":
+        headers = {"X-Start": str(start), "X-Total-Len": str(total_len)}
+        return Response(content=rows_to_arrow(rows), media_type=ARROW_STREAM_MEDIA_TYPE, headers=headers)
+    content = {"table_name": table_name, "start": start, "stop": stop, "total_len": total_len, **rows_to_json(rows, positions)}
+    return JSONResponse(content=content, status_code=200)
 
 @router.post("/tables/add_action/")
 @squirrel_action_error
@@ -1,6 +1,7 @@
 import { openCustomActionModal } from './custom_action_modal.js';
 import { InfoColModal } from './info_col_modal.js';
 import { openSidebarActionForm, openSidebarForm } from './sidebar_scripts.js';
+import { VirtualTable } from './virtual_table.js';
 
 
 // Table selection
@@ -25,21 +26,17 @@ function showTable(tableName) {
         }
     });
 
+    // Tables are rendered when first opened
+    const tableHtml = document.getElementById('table-html-' + tableName);
+    if (!tableHtml.dataset.loaded && pageLoaders[tableName]) {
+        pageLoaders[tableName](0);
+    }
+
     saveSelectedTable(tableName);
 }
-document.addEventListener('DOMContentLoaded', function() {
-    const selectedTable = getSelectedTable();
-    if (selectedTable && document.getElementById('table-' + selectedTable)) {
-        showTable(selectedTable);
-    } else {
-        const firstTableButton = document.querySelector('.table-select-btn');
-        if (firstTableButton) {
-            showTable(firstTableButton.textContent.trim());
-        }
-    }
-});
 
 // Pager
+const pageLoaders = {};  // tableName: loadPage(page)
 document.addEventListener('DOMContentLoaded', function() {
     document.querySelectorAll('.pager').forEach(function(pager) {
         const tableName = pager.dataset.table;
@@ -52,8 +49,9 @@ document.addEventListener('DOMContentLoaded', function() {
             fetch(`/tables/pager/?project_dir=${projectDir}&table_name=${tableName}&page=${page}&n=${n}`)
                 .then(response => response.text())
                 .then(data => {
-                    const cleanData = data.replace(/\\n/g, '').replace(/\\/g, '').slice(1, -1);
-                    document.getElementById(`table-html-${tableName}`).innerHTML = cleanData;
+                    const tableHtml = document.getElementById(`table-html-${tableName}`);
+                    tableHtml.innerHTML = data;
+                    tableHtml.dataset.loaded = 'true';
                     currentPage = page;
 
                     const startElement = page * n + 1;
@@ -65,6 +63,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 })
                 .catch(error => console.error('Error:', error));
         }
+        pageLoaders[tableName] = loadPage;
 
         pager.querySelector('#prev').addEventListener('click', function() {
             if (currentPage > 0) {
@@ -77,9 +76,43 @@ document.addEventListener('DOMContentLoaded', function() {
                 loadPage(currentPage + 1);
             }
         });
+
+        // Virtual scrolling through all the rows, instead of pages
+        let virtualTable = null;
+        const scrollButton = pager.querySelector('.virtual-scroll-btn');
+        scrollButton.addEventListener('click', function() {
+            const container = document.getElementById(`table-html-${tableName}`);
+            pager.querySelectorAll('#prev, #next, .pager-info').forEach(element => {
+                element.style.display = virtualTable ? '' : 'none';
+            });
+            scrollButton.classList.toggle('active', !virtualTable);
+            if (virtualTable) {
+                virtualTable.stop();
+                virtualTable = null;
+                container.classList.remove('virtual-scroll');
+                loadPage(currentPage);
+            } else {
+                virtualTable = new VirtualTable(container, projectDir, tableName, tableNumLines);
+                container.classList.add('virtual-scroll');
+                virtualTable.start()
+                    .then(() => addInfoButtons())
+                    .catch(error => console.error('Error:', error));
+            }
+        });
     });
 
 });
+document.addEventListener('DOMContentLoaded', function() {
+    const selectedTable = getSelectedTable();
+    if (selectedTable && document.getElementById('table-' + selectedTable)) {
+        showTable(selectedTable);
+    } else {
+        const firstTableButton = document.querySelector('.table-select-btn');
+        if (firstTableButton) {
+            showTable(firstTableButton.textContent.trim());
+        }
+    }
+});
 
 
 // Dropdown
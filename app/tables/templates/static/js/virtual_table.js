@@ -0,0 +1,137 @@
+// Virtual scrolling through a table: only the rows around the visible ones are fetched (from /tables/rows/) and rendered
+export class VirtualTable {
+    static BLOCK_ROWS = 200;
+    static BUFFER_ROWS = 50;
+    static MAX_CACHED_BLOCKS = 50;
+
+    constructor(container, projectDir, tableName, totalLen) {
+        Object.assign(this, {container, projectDir, tableName, totalLen});
+        this.blocks = new Map();
+        this.columns = null;
+        this.rowHeight = 37;
+        this.renderedRange = null;
+        this.onScroll = () => {
+            if (!this.scheduled) {
+                this.scheduled = true;
+                requestAnimationFrame(() => { this.scheduled = false; this.render(); });
+            }
+        };
+    }
+
+    async start() {
+        await this.getBlock(0);
+        this.table = document.createElement('table');
+        this.table.className = 'dataframe df-table virtual-table';
+        this.table.appendChild(this.createHeader());
+        this.tbody = document.createElement('tbody');
+        this.table.appendChild(this.tbody);
+        this.container.innerHTML = '';
+        this.container.appendChild(this.table);
+        this.container.addEventListener('scroll', this.onScroll);
+        await this.render();
+    }
+
+    stop() {
+        this.container.removeEventListener('scroll', this.onScroll);
+    }
+
+    createHeader() {
+        const thead = document.createElement('thead');
+        const tr = document.createElement('tr');
+        this.columns.forEach(column => {
+            const th = document.createElement('th');
+            th.dataset.columnidx = column.columnidx;
+            th.textContent = column.name;
+            tr.appendChild(th);
+        });
+        thead.appendChild(tr);
+        return thead;
+    }
+
+    getBlock(blockIdx) {
+        if (!this.blocks.has(blockIdx)) {
+            const start = blockIdx * VirtualTable.BLOCK_ROWS;
+            const stop = start + VirtualTable.BLOCK_ROWS;
+            const url = `/tables/rows/?project_dir=${encodeURIComponent(this.projectDir)}&table_name=${encodeURIComponent(this.tableName)}&start=${start}&stop=${stop}`;
+            const block = fetch(url)
+                .then(response => response.json().then(data => {
+                    if (!response.ok) {
+                        throw new Error(data.message);
+                    }
+                    return data;
+                }))
+                .then(data => {
+                    this.columns = this.columns || data.columns;
+                    this.totalLen = data.total_len;
+                    return data.data;
+                })
+                .catch(error => {
+                    this.blocks.delete(blockIdx);
+                    throw error;
+                });
+            this.blocks.set(blockIdx, block);
+            if (this.blocks.size > VirtualTable.MAX_CACHED_BLOCKS) {
+                this.blocks.delete(this.blocks.keys().next().value);
+            }
+        }
+        return this.blocks.get(blockIdx);
+    }
+
+    async getRows(start, stop) {
+        const rows = [];
+        const firstBlock = Math.floor(start / VirtualTable.BLOCK_ROWS);
+        const lastBlock = Math.floor((stop - 1) / VirtualTable.BLOCK_ROWS);
+        for (let blockIdx = firstBlock; blockIdx <= lastBlock; blockIdx++) {
+            const data = await this.getBlock(blockIdx);
+            const blockStart = blockIdx * VirtualTable.BLOCK_ROWS;
+            const blockLen = data.length ? data[0].length : 0;
+            for (let rowIdx = Math.max(start, blockStart); rowIdx < Math.min(stop, blockStart + blockLen); rowIdx++) {
+                rows.push(data.map(values => values[rowIdx - blockStart]));
+            }
+        }
+        return rows;
+    }
+
+    createSpacer(height) {
+        const tr = document.createElement('tr');
+        tr.className = 'virtual-spacer';
+        tr.style.height = `${height}px`;
+        return tr;
+    }
+
+    async render() {
+        const firstVisible = Math.floor(this.container.scrollTop / this.rowHeight);
+        const visibleRows = Math.ceil(this.container.clientHeight / this.rowHeight) + 1;
+        const start = Math.max(0, firstVisible - VirtualTable.BUFFER_ROWS);
+        const stop = Math.min(this.totalLen, firstVisible + visibleRows + VirtualTable.BUFFER_ROWS);
+        if (this.renderedRange && this.renderedRange[0] <= firstVisible && firstVisible + visibleRows <= this.renderedRange[1]) {
+            return;
+        }
+        this.renderedRange = [start, stop];
+        const rows = await this.getRows(start, stop);
+        if (this.renderedRange[0] !== start || this.renderedRange[1] !== stop) {
+            return;  // A more recent render is in progress
+        }
+
+        const fragment = document.createDocumentFragment();
+        fragment.appendChild(this.createSpacer(start * this.rowHeight));
+        rows.forEach(values => {
+            const tr = document.createElement('tr');
+            values.forEach(value => {
+                const td = document.createElement('td');
+                td.textContent = value === null ? 'NaN' : value;
+                tr.appendChild(td);
+            });
+            fragment.appendChild(tr);
+        });
+        fragment.appendChild(this.createSpacer((this.totalLen - start - rows.length) * this.rowHeight));
+        this.tbody.replaceChildren(fragment);
+
+        const renderedRow = this.tbody.querySelector('tr:not(.virtual-spacer)');
+        if (renderedRow && renderedRow.offsetHeight && renderedRow.offsetHeight !== this.rowHeight) {
+            this.rowHeight = renderedRow.offsetHeight;
+            this.renderedRange = null;
+            this.render();
+        }
+    }
+}
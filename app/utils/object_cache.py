@@ -0,0 +1,80 @@
+import copy
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+
+def load_pickle(path: str):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+class ObjectCache:
+    """
+    Process-wide cache of the objects loaded from files (e.g. pipeline.pkl, saved tables), LRU and bounded in size
+      * An entry is valid while its file keeps the same mtime, size and inode, so the writes of other processes are seen
+      * The size of an entry is the size of its file (max size in MB from SQUIRREL_OBJECT_CACHE_MB)
+      * The objects are shared by the callers (read only, e.g. tables), or copied for the callers modifying them (copy=True)
+    """
+    _entries = OrderedDict()  # path: (file_key, size, obj)
+    _size = 0
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _get_max_size() -> float:
+        return float(os.environ.get("SQUIRREL_OBJECT_CACHE_MB", 512)) * 1024 * 1024
+
+    @staticmethod
+    def _get_file_key(path: str) -> tuple:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    @classmethod
+    def load(cls, path: str, loader=load_pickle, copy: bool = False):
+        """Object of the file (loaded with loader(path) if not cached), raises FileNotFoundError"""
+        try:
+            file_key = cls._get_file_key(path)
+        except FileNotFoundError:
+            cls.invalidate(path)
+            raise
+        with cls._lock:
+            entry = cls._entries.get(path)
+            if entry and entry[0] == file_key:
+                cls._entries.move_to_end(path)
+                return cls._copy(entry[2], copy)
+        obj = loader(path)
+        cls._set(path, file_key, cls._copy(obj, copy))
+        return obj
+
+    @classmethod
+    def set(cls, path: str, obj, copy: bool = False):
+        """Caches obj as the content of the file, after it was written (invalidate it if the write failed)"""
+        cls._set(path, cls._get_file_key(path), cls._copy(obj, copy))
+
+    @staticmethod
+    def _copy(obj, copy_obj: bool):
+        return copy.deepcopy(obj) if copy_obj else obj
+
+    @classmethod
+    def _set(cls, path, file_key, obj):
+        size = file_key[1]
+        with cls._lock:
+            cls._pop(path)
+            if size > cls._get_max_size():
+                return
+            cls._entries[path] = (file_key, size, obj)
+            cls._size += size
+            while cls._size > cls._get_max_size():
+                cls._pop(next(iter(cls._entries)))
+
+    @classmethod
+    def invalidate(cls, path: str):
+        with cls._lock:
+            cls._pop(path)
+
+    @classmethod
+    def _pop(cls, path):
+        entry = cls._entries.pop(path, None)
+        if entry:
+            cls._size -= entry[1]
@@ -0,0 +1,50 @@
+"""
+Rendering time of a table page, render_table_html vs DataFrame.to_html with the header rewritten (previous Table.to_html)
+    python -m tests.benchmarks.html_benchmark
+"""
+import argparse
+import numpy as np
+import pandas as pd
+
+from app.tables.models.table_html import render_table_html
+from tests.benchmarks.utils import time_ms
+
+
+def _pandas_to_html_with_idx(df):
+    html = df.to_html(classes='df-table', index=False)
+    header_html = ""
+    for idx, col_id in enumerate(df.columns):
+        header_html += f"""<th data-columnidx="{df.columns[idx]}">{df.columns[idx]}</th>\n"""
+    header_start = html.find('<thead>')
+    header_end = html.find('</thead>')
+    modified_header = html[header_start:header_end].rsplit('<tr', 1)
+    return html[:header_start] + f"{modified_header[0]}<tr>{header_html}</tr>" + html[header_end:]
+
+
+def _create_table(rows: int, columns: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    data = {}
+    for idx in range(columns):
+        if idx % 3 == 0:
+            data[f"int_{idx}"] = rng.integers(0, 1000, rows)
+        elif idx % 3 == 1:
+            data[f"float_{idx}"] = rng.random(rows) * 1000
+        else:
+            data[f"text_{idx}"] = [f"<value {value}>" for value in rng.integers(0, 100, rows)]
+    return pd.DataFrame(data)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    for rows, columns in [(10, 20), (10, 500), (100, 500), (5000, 20)]:
+        df = _create_table(rows, columns)
+        pandas_ms = time_ms(lambda: _pandas_to_html_with_idx(df), args.repeat)
+        renderer_ms = time_ms(lambda: render_table_html(df), args.repeat)
+        print(f"{rows} rows x {columns} columns: to_html {pandas_ms:.1f} ms, renderer {renderer_ms:.1f} ms ({pandas_ms / renderer_ms:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Latency of a pager read from a saved table, memory-mapped (TableStorage.read_rows) vs fully loaded (TableStorage.load_table)
+    python -m tests.benchmarks.pager_benchmark --rows 50000000
+"""
+import argparse
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from app.tables.models.table_storage import TableStorage
+from tests.benchmarks.utils import time_ms
+
+
+def _create_table_file(storage: TableStorage, rows: int) -> dict:
+    """Catalog entry of a table of rows rows, written by batches (the table is never fully in memory)"""
+    os.makedirs(storage.path, exist_ok=True)
+    schema = pa.Schema.from_pandas(pd.DataFrame({"id": [0], "price": [0.0], "name": ["x"]}), preserve_index=False)
+    entry = {"rows": rows, "columns": schema.names, "file": "bench.arrow", "batch_rows": TableStorage.BATCH_ROWS}
+    rng = np.random.default_rng(0)
+    with pa.OSFile(storage.get_table_path(entry), 'wb') as sink, pa.ipc.new_file(sink, schema) as writer:
+        for batch_start in range(0, rows, TableStorage.BATCH_ROWS):
+            batch_rows = min(TableStorage.BATCH_ROWS, rows - batch_start)
+            writer.write_batch(pa.record_batch([
+                pa.array(np.arange(batch_start, batch_start + batch_rows)),
+                pa.array(rng.random(batch_rows)),
+                pa.array(np.char.add("name_", (np.arange(batch_rows) % 1000).astype(str))),
+            ], schema=schema))
+    return entry
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50_000_000)
+    parser.add_argument("--page-rows", type=int, default=10)
+    parser.add_argument("--full-load", action="store_true", help="Also time the pager on the fully loaded table")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        storage = TableStorage(temp_dir)
+        entry = _create_table_file(storage, args.rows)
+        print(f"{args.rows} rows, file {os.path.getsize(storage.get_table_path(entry)) / 1024 ** 2:.0f} MB")
+        for start in (0, args.rows // 2, args.rows - args.page_rows):
+            ms = time_ms(lambda: storage.read_rows(entry, start, start + args.page_rows), repeat=20)
+            print(f"memory-mapped page at row {start}: {ms:.2f} ms")
+        if args.full_load:
+            ms = time_ms(lambda: storage.load_table(entry).iloc[:args.page_rows], repeat=1)
+            print(f"fully loaded page: {ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
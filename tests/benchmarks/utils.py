@@ -0,0 +1,9 @@
+import time
+
+
+def time_ms(func, repeat: int) -> float:
+    """Mean execution time of func in milliseconds"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
@@ -13,6 +13,9 @@ from unittest.mock import patch
 from selenium.webdriver.firefox.options import Options as FirefoxOptions  
 from selenium.webdriver import Firefox
 
+# Unit tests patch os.getcwd, a pipeline running in another process would not see it
+os.environ.setdefault("SQUIRREL_POOL_MODE", "thread")
+
 from app.main import app
 from app.pipelines.models.actions import CreateTable, AddColumn
 from app.pipelines.models.pipeline_action import PipelineAction
@@ -0,0 +1,69 @@
+import json
+import os
+import pytest
+import pandas as pd
+
+from unittest.mock import patch
+
+from app.pipelines.models.action_cache import ActionCache
+from app.pipelines.models.actions import AddColumn
+from app.pipelines.models.pipeline import Pipeline
+from app.projects.models.project import Project
+from tests import MOCK_PROJECT
+
+
+def test_get_keys_depend_on_input_tables(temp_project_dir_fixture):
+    pipeline = Pipeline(MOCK_PROJECT)
+    keys = ActionCache.get_keys(pipeline.actions)
+
+    pipeline.edit_action(0, {"data_source_dir": "Csv_random"})
+    new_keys = ActionCache.get_keys(pipeline.actions)
+
+    assert new_keys[0] != keys[0], "Edited action should have a new key"
+    assert new_keys[1:] == keys[1:], "Actions not reading the edited table should keep their key"
+
+@pytest.mark.asyncio
+async def test_reorder_reuses_cached_results(temp_project_dir_fixture):
+    Project.instantiate_from_dir(MOCK_PROJECT).update_settings({"misc": json.dumps({"action_cache_mb": 1024})})
+    pipeline = Pipeline(MOCK_PROJECT)
+    await pipeline.run_pipeline()
+
+    pipeline.confirm_new_order("1-item,2-item,0-item")
+    with patch.object(AddColumn, "execute", side_effect=Exception("Should not be executed")):
+        tables = await pipeline.run_pipeline()
+
+    assert "ref + price" in tables["random"].columns, "Cached result should be reused"
+    assert set(tables.keys()) == {"ordered", "random"}, "All tables should be restored"
+    assert ActionCache(MOCK_PROJECT).get_stats()["hits"] > 0, "Cache hits should be counted"
+
+def test_set_evicts_least_recently_used(temp_project_dir_fixture):
+    action_cache = ActionCache(MOCK_PROJECT, max_size_mb=0.05)
+    table = pd.DataFrame({"A": range(5000)})
+
+    action_cache.set("old", {"table": table})
+    action_cache.set("new", {"table": table})
+
+    assert action_cache.get("old") is None, "Least recently used entry should be evicted"
+    assert action_cache.get("new") is not None, "Most recent entry should be kept"
+    assert action_cache.get_stats()["misses"] == 1, "Cache misses should be counted"
+
+def test_set_skips_oversized_tables(temp_project_dir_fixture):
+    action_cache = ActionCache(MOCK_PROJECT, max_size_mb=0.01)
+
+    with patch("app.pipelines.models.action_cache.pickle.dump", side_effect=Exception("Should not be pickled")):
+        action_cache.set("big", {"table": pd.DataFrame({"A": range(5000)})})
+
+    assert action_cache.get("big") is None
+
+@pytest.mark.asyncio
+async def test_index_is_saved_once_per_run(temp_project_dir_fixture):
+    with patch.object(ActionCache, "save", autospec=True) as save:
+        await Pipeline(MOCK_PROJECT).run_pipeline()
+
+    assert save.call_count == 1
+
+@pytest.mark.asyncio
+async def test_cache_is_disabled_by_default(temp_project_dir_fixture):
+    await Pipeline(MOCK_PROJECT).run_pipeline()
+
+    assert not os.path.exists(ActionCache(MOCK_PROJECT).path), "Nothing should be written without action_cache_mb"
@@ -1,4 +1,5 @@
 import pytest
+import tracemalloc
 import pandas as pd
 import numpy as np
 
@@ -28,6 +29,24 @@ async def test_add_column_sq_action(temp_project_dir_fixture):
     assert result["test_table"]["new_col"].tolist() == [5, 7, 9]
 
 
+@pytest.mark.asyncio
+async def test_add_column_sq_action_other_table(temp_project_dir_fixture):
+    action = AddColumn({
+        "table_name": "test_table",
+        "col_name": "new_col",
+        "col_value": "t['other']c['A'] + c['B'].astype(str).str.replace('c[', '')",
+    })
+    tables = {
+        "test_table": pd.DataFrame({"B": [4, 5, 6]}),
+        "other": pd.DataFrame({"A": ["1", "2", "3"]}),
+    }
+
+    result = await action.execute(tables)
+
+    assert result["test_table"]["new_col"].tolist() == ["14", "25", "36"]
+    assert action.get_input_tables() == {"test_table", "other"}
+
+
 @pytest.mark.asyncio
 async def test_add_column_python(temp_project_dir_fixture):
     action = AddColumn({
@@ -165,6 +184,25 @@ async def test_create_table_from_other_tables(temp_project_dir_fixture):
     assert result["new_table"]["A"].tolist() == [1, 2, 3]
 
 
+@pytest.mark.asyncio
+async def test_create_table_from_other_tables_copy_on_write(temp_project_dir_fixture):
+    tables = {"source": pd.DataFrame({"A": np.arange(1_000_000), "B": np.arange(1_000_000) * 0.5})}
+    forks = [CreateTable({"table_name": f"fork_{i}", "source_creation_type": "other_tables", "table_df": "source"})
+             for i in range(5)]
+
+    tracemalloc.start()
+    for action in forks:
+        await action.execute(tables)
+    _, forks_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    tables["fork_0"]["A"] = -1
+    tables["fork_1"].loc[0, "B"] = -1
+
+    assert forks_peak < tables["source"].memory_usage().sum() / 10, "Forked tables should not copy the data"
+    assert tables["source"]["A"].iloc[0] == 0 and tables["source"]["B"].iloc[0] == 0, "Source should not be changed"
+    assert tables["fork_2"]["A"].iloc[0] == 0 and tables["fork_2"]["B"].iloc[0] == 0, "Other forks should not be changed"
+
+
 @pytest.mark.asyncio
 async def test_custom_action(temp_project_dir_fixture):
     action = CustomAction({
@@ -0,0 +1,33 @@
+import os
+
+from app.cli import main
+from tests import MOCK_PROJECT
+
+
+def test_run_projects(temp_project_dir_fixture, capsys):
+    exit_code = main(["run", MOCK_PROJECT, "--export", "csv", "json"])
+
+    project_path = os.path.join(temp_project_dir_fixture, "_projects", MOCK_PROJECT)
+    assert exit_code == 0, capsys.readouterr().out
+    assert os.path.exists(os.path.join(project_path, "data_tables", "catalog.json")), "The tables should be saved for the tables page"
+    assert sorted(os.listdir(os.path.join(project_path, "exports"))) == ["ordered.csv", "ordered.json", "random.csv", "random.json"]
+    assert f"{MOCK_PROJECT}: ok (4 exports)" in capsys.readouterr().out
+
+def test_run_projects_error(temp_project_dir_fixture, capsys):
+    exit_code = main(["run", MOCK_PROJECT, "unknown_project"])
+
+    output = capsys.readouterr().out
+    assert exit_code == 1, "A failing project should be reported by the exit code"
+    assert f"{MOCK_PROJECT}: ok" in output and "unknown_project: error" in output, "The other projects should still be run"
+
+def test_run_all_projects_ignores_stray_entries(temp_project_dir_fixture, capsys):
+    projects_path = os.path.join(temp_project_dir_fixture, "_projects")
+    open(os.path.join(projects_path, ".DS_Store"), "w").close()
+    os.makedirs(os.path.join(projects_path, "not_a_project"))
+
+    exit_code = main(["run", "--all"])
+
+    output = capsys.readouterr().out
+    assert exit_code == 0, output
+    assert f"{MOCK_PROJECT}: ok" in output
+    assert ".DS_Store" not in output and "not_a_project" not in output
@@ -1,3 +1,4 @@
+import os
 import pytest
 import pandas as pd
 
@@ -33,3 +34,47 @@ def test_create_table(temp_project_dir_fixture):
     dataframe =  source.create_table()
 
     assert isinstance(dataframe, pd.DataFrame), "DataSourceFile create table method should return a DataFrame"
+
+def test_create_table_preview(temp_project_dir_fixture):
+    source = DataSourceFactory.init_source_from_dir(MOCK_PROJECT, "Csv_ordered")
+    table = source.create_table()
+
+    head = source.create_table(preview={"rows": 10, "sampling": "head"})
+    sample = source.create_table(preview={"rows": 10, "sampling": "random"})
+
+    pd.testing.assert_frame_equal(head, table.head(10))
+    assert len(sample.index) == 10 and sample.index.is_monotonic_increasing, "Sample should keep the original order"
+    pd.testing.assert_frame_equal(sample, source.create_table(preview={"rows": 10, "sampling": "random"}))
+
+@pytest.mark.asyncio
+async def test_preview_files(temp_project_dir_fixture):
+    source = DataSourceFactory.init_source_from_dir(MOCK_PROJECT, "Csv_ordered")
+    source.create_table(preview={"rows": 10, "sampling": "head"})
+    source.create_table(preview={"rows": 20, "sampling": "head"})
+
+    assert os.path.exists(os.path.join(source.path, "preview_head_10.pkl")), "Previews of other row counts should be kept"
+    assert not [file_name for file_name in os.listdir(source.path) if file_name.endswith(".tmp")]
+
+    await source.update_source_settings({})
+
+    assert not [file_name for file_name in os.listdir(source.path) if file_name.startswith("preview_")], \
+        "Previews should be removed when the data is refreshed"
+
+def test_iter_chunks(temp_project_dir_fixture):
+    source = DataSourceFactory.init_source_from_dir(MOCK_PROJECT, "Csv_random")
+    source._create_pickle_file(os.path.join(source.path, "data.csv"))  # Same pandas version for both files
+
+    chunks = list(source.iter_chunks(30, columns={"name", "price"}))
+
+    assert [len(chunk.index) for chunk in chunks] == [30, 30, 30, 10], "The csv should be read by chunks"
+    pd.testing.assert_frame_equal(pd.concat(chunks), source.create_table(columns={"name", "price"}))
+
+def test_iter_chunks_keeps_dtypes(temp_project_dir_fixture):
+    source = DataSourceFactory.init_source_from_dir(MOCK_PROJECT, "Csv_random")
+    pd.DataFrame({"name": [None] * 30 + ["a", "b"], "price": [1] * 30 + [None, 2.5]}).to_csv(os.path.join(source.path, "data.csv"), index=False)
+    source._create_pickle_file(os.path.join(source.path, "data.csv"))
+
+    chunks = list(source.iter_chunks(30))
+
+    assert chunks[0]["name"].dtype == chunks[1]["name"].dtype, "A chunk of NaN only should keep the string dtype"
+    pd.testing.assert_frame_equal(pd.concat(chunks), source.create_table())
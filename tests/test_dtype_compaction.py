@@ -0,0 +1,71 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.data_sources.models.data_source_factory import DataSourceFactory
+from app.pipelines.models.actions import AddColumn, KeepRow
+from app.pipelines.models.dtype_compaction import ARROW_STRING_DTYPE, compact_table
+from app.pipelines.models.pipeline import Pipeline
+from app.projects.models.project import Project
+from tests import MOCK_PROJECT
+
+
+def test_compact_table():
+    table = pd.DataFrame({
+        "small_int": np.arange(1000, dtype=np.int64) % 100,
+        "exact_float": np.arange(1000, dtype=np.float64) / 4,
+        "precise_float": np.arange(1000, dtype=np.float64) / 3,
+        "strings": pd.Series(["a", "b", np.nan, "c"] * 250, dtype=object),
+        "flag": [True, False] * 500,
+    })
+
+    compacted, saved_bytes = compact_table(table)
+
+    assert (compacted.dtypes.drop("strings") == table.dtypes.drop("strings")).all(), "Numeric widths should be kept"
+    assert compacted["strings"].dtype == ARROW_STRING_DTYPE, "Strings should use the Arrow storage, not categories"
+    assert set(saved_bytes) == {"strings"}, "Saved bytes should be reported by compacted column"
+    pd.testing.assert_frame_equal(compacted.astype(table.dtypes.to_dict()), table)
+    assert table["strings"].dtype == object, "The original table should not be modified"
+
+@pytest.mark.asyncio
+async def test_run_pipeline_compact_dtypes(temp_project_dir_fixture):
+    tables = await Pipeline(MOCK_PROJECT).run_pipeline()
+    Project.instantiate_from_dir(MOCK_PROJECT).update_settings({"misc": json.dumps({"compact_dtypes": True})})
+
+    compacted_tables = await Pipeline(MOCK_PROJECT).run_pipeline()
+
+    pipeline_action = Pipeline(MOCK_PROJECT).actions[0]
+    assert pipeline_action.profile["compaction"], "The bytes saved should be reported in the profile"
+    assert "compacted" in pipeline_action.get_profile_summary()
+    assert sum(t.memory_usage(deep=True).sum() for t in compacted_tables.values()) \
+        < sum(t.memory_usage(deep=True).sum() for t in tables.values())
+
+@pytest.mark.asyncio
+async def test_compaction_keeps_string_results(temp_project_dir_fixture):
+    source = DataSourceFactory.init_source_from_dir(MOCK_PROJECT, "Csv_ordered")
+    pd.DataFrame({"mock_name": ["a", "b", "c", "d"] * 25, "mock_price": range(100)}).to_pickle(os.path.join(source.path, "data.pkl"))
+    pipeline = Pipeline(MOCK_PROJECT)
+    pipeline.add_action(AddColumn({"project_dir": MOCK_PROJECT, "table_name": "ordered", "col_name": "suffixed",
+                                   "col_value": "c['mock_name'] + '_'"}))
+    pipeline.add_action(KeepRow({"table_name": "ordered", "keep_domain": "mock_name > 'b'"}))
+    tables = await Pipeline(MOCK_PROJECT).run_pipeline()
+    Project.instantiate_from_dir(MOCK_PROJECT).update_settings({"misc": json.dumps({"compact_dtypes": True})})
+
+    compacted_tables = await Pipeline(MOCK_PROJECT).run_pipeline()
+
+    pd.testing.assert_frame_equal(compacted_tables["ordered"].astype(object), tables["ordered"].astype(object))
+
+@pytest.mark.asyncio
+async def test_compaction_keeps_arithmetic_results(temp_project_dir_fixture):
+    pipeline = Pipeline(MOCK_PROJECT)
+    for col_name, col_value in [("times", "c['mock_price'] * 1000"), ("square", "c['mock_price'] * c['mock_price']"),
+                                ("third", "c['mock_price'] / 3")]:
+        pipeline.add_action(AddColumn({"project_dir": MOCK_PROJECT, "table_name": "ordered", "col_name": col_name, "col_value": col_value}))
+    tables = await Pipeline(MOCK_PROJECT).run_pipeline()
+    Project.instantiate_from_dir(MOCK_PROJECT).update_settings({"misc": json.dumps({"compact_dtypes": True})})
+
+    compacted_tables = await Pipeline(MOCK_PROJECT).run_pipeline()
+
+    pd.testing.assert_frame_equal(compacted_tables["ordered"][["times", "square", "third"]], tables["ordered"][["times", "square", "third"]])
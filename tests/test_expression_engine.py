@@ -0,0 +1,66 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from app.pipelines.models.actions import AddColumn, KeepRow
+from app.pipelines.models.expression_engine import NUMEXPR_AVAILABLE, NUMEXPR_MIN_ROWS, evaluate_domain, evaluate_expression
+
+
+def _get_tables(rows=NUMEXPR_MIN_ROWS):
+    return {"test_table": pd.DataFrame({
+        "A": np.arange(rows),
+        "B": np.arange(rows) * 0.5,
+        "S": [f"name_{i}" for i in range(rows)],
+    })}
+
+@pytest.mark.skipif(not NUMEXPR_AVAILABLE, reason="numexpr is not installed")
+def test_evaluate_expression_numexpr():
+    tables = _get_tables()
+
+    result, engine = evaluate_expression("c['A'] * 2 + c['B'] ** 2 - 1", "test_table", tables)
+
+    assert engine == "numexpr", "Arithmetic on numeric columns should be evaluated by numexpr"
+    expected = tables["test_table"]["A"] * 2 + tables["test_table"]["B"] ** 2 - 1
+    np.testing.assert_allclose(result, expected)
+
+def test_evaluate_expression_python_fallback():
+    tables = _get_tables()
+
+    result, engine = evaluate_expression("c['S'].str.len() + c['A']", "test_table", tables)
+
+    assert engine == "python", "Method calls should fall back to python"
+    assert result.tolist() == (tables["test_table"]["S"].str.len() + tables["test_table"]["A"]).tolist()
+
+def test_evaluate_expression_small_table():
+    _, engine = evaluate_expression("c['A'] + 1", "test_table", _get_tables(rows=10))
+
+    assert engine == "python", "Small tables should not use numexpr"
+
+@pytest.mark.parametrize("rows", [10, NUMEXPR_MIN_ROWS])
+@pytest.mark.parametrize("code", ["(c['A'] > 1) and (c['B'] < 2)", "(c['A'] > 1) or (c['B'] < 2)", "not (c['A'] > 1)"])
+def test_evaluate_expression_boolean_keywords(rows, code):
+    with pytest.raises(ValueError, match="ambiguous"):
+        evaluate_expression(code, "test_table", _get_tables(rows=rows))
+
+@pytest.mark.skipif(not NUMEXPR_AVAILABLE, reason="numexpr is not installed")
+def test_evaluate_domain_numexpr():
+    table = _get_tables()["test_table"]
+
+    mask, engine = evaluate_domain(table, "A > 10 and B < 100")
+
+    assert engine == "numexpr"
+    assert mask.tolist() == ((table["A"] > 10) & (table["B"] < 100)).tolist()
+
+@pytest.mark.asyncio
+async def test_actions_report_engine(temp_project_dir_fixture):
+    tables = _get_tables()
+    keep_action = KeepRow({"table_name": "test_table", "keep_domain": "S.str.endswith('0')"})
+    add_action = AddColumn({"table_name": "test_table", "col_name": "C", "col_value": "c['A'] + c['B']"})
+
+    await keep_action.execute(tables)
+    await add_action.execute(tables)
+
+    assert keep_action.engine in ("python", "numexpr")
+    assert len(tables["test_table"]) == NUMEXPR_MIN_ROWS // 10
+    assert add_action.engine in ("python", "numexpr")
+    assert tables["test_table"]["C"].tolist() == (tables["test_table"]["A"] + tables["test_table"]["B"]).tolist()
@@ -0,0 +1,83 @@
+import json
+import pickle
+import pytest
+
+from unittest.mock import patch
+
+from app.pipelines.models.pipeline import Pipeline
+from app.projects.models.project import Project
+from app.tables.models.table_manager import TableManager
+from app.utils.object_cache import ObjectCache
+from tests import MOCK_PROJECT
+
+
+def test_pipeline_is_loaded_once(temp_project_dir_fixture):
+    Pipeline(MOCK_PROJECT)
+    with patch("app.utils.object_cache.pickle.load", side_effect=Exception("Should not be unpickled")):
+        pipeline = Pipeline(MOCK_PROJECT)
+
+    assert len(pipeline.actions) == 3
+
+def test_write_updates_cache(temp_project_dir_fixture):
+    pipeline = Pipeline(MOCK_PROJECT)
+    pipeline.delete_action(2)
+
+    assert len(Pipeline(MOCK_PROJECT).actions) == 2
+
+def test_pipeline_is_not_shared(temp_project_dir_fixture):
+    pipeline = Pipeline(MOCK_PROJECT)
+    pipeline.actions[2].profile = {"wall_time": 1}
+    pipeline.actions.pop()
+
+    assert len(Pipeline(MOCK_PROJECT).actions) == 3, "Unsaved changes should not be seen by other pipelines"
+    assert Pipeline(MOCK_PROJECT).actions[2].profile is None
+
+def test_failed_write_invalidates_cache(temp_project_dir_fixture):
+    pipeline = Pipeline(MOCK_PROJECT)
+    pipeline.actions.pop()
+    with patch("app.pipelines.models.pipeline.pickle.dump", side_effect=Exception("Disk full")), pytest.raises(Exception):
+        pipeline._save_actions()
+
+    assert ObjectCache._entries.get(pipeline.pipeline_path) is None
+
+def test_write_of_other_process_invalidates_cache(temp_project_dir_fixture):
+    pipeline = Pipeline(MOCK_PROJECT)
+    with open(pipeline.pipeline_path, 'wb') as f:
+        pickle.dump(pipeline.actions[:1], f)
+
+    assert len(Pipeline(MOCK_PROJECT).actions) == 1
+
+def test_lru_eviction(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQUIRREL_OBJECT_CACHE_MB", str(2.5 / 1024))  # 2.5 KB
+    paths = []
+    for idx in range(3):
+        paths.append(str(tmp_path / f"{idx}.pkl"))
+        with open(paths[-1], 'wb') as f:
+            pickle.dump(b"x" * 1000, f)
+
+    ObjectCache.load(paths[0])
+    ObjectCache.load(paths[1])
+    ObjectCache.load(paths[0])
+    ObjectCache.load(paths[2])
+
+    assert paths[0] in ObjectCache._entries
+    assert paths[1] not in ObjectCache._entries, "Least recently used entry should be evicted"
+    assert ObjectCache._size <= 2.5 * 1024
+
+@pytest.mark.asyncio
+async def test_lazy_table_manager_is_cached(temp_project_dir_fixture):
+    await TableManager.init_from_project_dir(MOCK_PROJECT)
+    table_manager = await TableManager.init_from_project_dir(MOCK_PROJECT, lazy=True)
+    lazy_table_manager = await TableManager.init_from_project_dir(MOCK_PROJECT, lazy=True)
+
+    assert lazy_table_manager is table_manager
+    assert lazy_table_manager.tables["random"].content is table_manager.tables["random"].content
+
+@pytest.mark.asyncio
+async def test_cached_table_manager_follows_settings(temp_project_dir_fixture):
+    await TableManager.init_from_project_dir(MOCK_PROJECT, lazy=True)
+    Project.instantiate_from_dir(MOCK_PROJECT).update_settings({"misc": json.dumps({"table_len": 25})})
+
+    table_manager = await TableManager.init_from_project_dir(MOCK_PROJECT, lazy=True)
+
+    assert table_manager.display_len == 25
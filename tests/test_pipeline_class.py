@@ -1,8 +1,25 @@
+import json
+import os
 import pytest
+import shutil
+import threading
+import tracemalloc
+import numpy as np
+import pandas as pd
 
+from unittest.mock import patch
+
+from app.pipelines.models.action_cache import ActionCache
 from app.pipelines.models.pipeline import Pipeline
 from app.pipelines.models.pipeline_action import PipelineAction
-from app.pipelines.models.actions import AddColumn
+from app.pipelines.models.pipeline_checkpoints import PipelineCheckpoints
+from app.pipelines.models.pipeline_plan import FusedFilters
+from app.pipelines.models.actions import (
+    AddColumn, CreateTable, CustomAction, DeleteRow, DropColumn, FormatString, GroupBy, KeepRow, RemoveUnderOver
+)
+from app.pipelines.models.pipeline_run import PipelineRun, PipelineRunCancelled
+from app.pipelines.models.pipeline_scheduler import PipelineScheduler
+from app.projects.models.project import Project
 from tests import MOCK_PROJECT
 
 
@@ -87,3 +104,294 @@ async def test_run_pipeline(temp_project_dir_fixture):
     assert tables is not None, "Should return tables"
     assert isinstance(tables, dict), "Should return a dict of tables"
     assert tables.get("ordered") is not None, "Should contain 'ordered' table"
+
+@pytest.mark.asyncio
+async def test_run_pipeline_resumes_from_checkpoint(temp_project_dir_fixture):
+    Project.instantiate_from_dir(MOCK_PROJECT).update_settings({"misc": json.dumps({"action_cache_mb": 1024})})
+    pipeline = Pipeline(MOCK_PROJECT)
+    await pipeline.run_pipeline()
+    pipeline.edit_action(2, {"col_name": "edited col"})
+
+    with patch.object(CreateTable, "execute", side_effect=Exception("Should not be executed")):
+        tables = await pipeline.run_pipeline()
+
+    assert "edited col" in tables["random"].columns, "Edited action should be executed"
+    assert "ref + price" not in tables["random"].columns, "Previous version of the action should not be in the tables"
+
+@pytest.mark.asyncio
+async def test_edit_action_invalidates_following_checkpoints(temp_project_dir_fixture):
+    Project.instantiate_from_dir(MOCK_PROJECT).update_settings({"misc": json.dumps({"action_cache_mb": 1024})})
+    pipeline = Pipeline(MOCK_PROJECT)
+    await pipeline.run_pipeline()
+
+    pipeline.edit_action(1, {"table_name": "updated"})
+
+    signatures = PipelineCheckpoints.get_signatures(pipeline.actions)
+    start_idx, tables, _ = pipeline.checkpoints.resume(signatures, ActionCache(MOCK_PROJECT))
+    assert start_idx == 1, "Should resume right after the last unchanged action"
+    assert list(tables.keys()) == ["ordered"], "Checkpoint should contain the tables created before the edited action"
+
+def test_get_dependencies(temp_project_dir_fixture):
+    pipeline = Pipeline(MOCK_PROJECT)
+    pipeline.add_action(CustomAction({"custom_action_code": "t['ordered'] = t['random']", "custom_action_name": "Barrier"}))
+
+    dependencies = PipelineScheduler.get_dependencies(pipeline.actions)
+
+    assert dependencies[1] == set(), "Tables creation from sources should not depend on each other"
+    assert dependencies[2] == {1}, "Action should only depend on the action creating its table"
+    assert dependencies[3] == {0, 1, 2}, "Custom action should wait for all previous actions"
+
+@pytest.mark.asyncio
+async def test_scheduler_is_sequential_with_one_worker():
+    threads = []
+    async def run_action(idx):
+        threads.append((idx, threading.current_thread()))
+
+    await PipelineScheduler([None] * 3, max_workers=1).run(run_action)
+
+    assert threads == [(idx, threading.current_thread()) for idx in range(3)], "Actions should run in order in the event loop"
+
+@pytest.mark.asyncio
+async def test_run_pipeline_parallel_matches_sequential(temp_project_dir_fixture):
+    pipeline = Pipeline(MOCK_PROJECT)
+    pipeline.add_action(CreateTable({"table_name": "copy", "source_creation_type": "other_tables", "table_df": "random"}))
+    pipeline.add_action(KeepRow({"table_name": "random", "keep_domain": "price > 0"}))
+
+    project = Project.instantiate_from_dir(MOCK_PROJECT)
+
+    project.update_settings({"misc": json.dumps({"parallel_workers": 1})})
+    sequential_tables = await pipeline.run_pipeline()
+    shutil.rmtree(pipeline.checkpoints.path)
+    project.update_settings({"misc": json.dumps({"parallel_workers": 4})})
+    parallel_tables = await pipeline.run_pipeline()
+
+    assert sequential_tables.keys() == parallel_tables.keys(), "Parallel run should create the same tables"
+    for name, table in sequential_tables.items():
+        pd.testing.assert_frame_equal(table, parallel_tables[name])
+
+@pytest.mark.asyncio
+async def test_run_pipeline_reports_progress(temp_project_dir_fixture):
+    pipeline = Pipeline(MOCK_PROJECT)
+    run = PipelineRun(MOCK_PROJECT)
+
+    await pipeline.run_pipeline(run=run)
+
+    done_events = [event for event in run.get_events() if event["type"] == "action_done"]
+    assert sorted(event["idx"] for event in done_events) == [0, 1, 2], "Each action should report its completion"
+    assert all(event["rows_out"] == 100 for event in done_events), "Events should contain the number of rows"
+
+@pytest.mark.asyncio
+async def test_run_pipeline_preview_resumes_from_checkpoint(temp_project_dir_fixture):
+    Project.instantiate_from_dir(MOCK_PROJECT).update_settings({"misc": json.dumps({"preview_rows": 10, "compact_dtypes": True, "action_cache_mb": 1024})})
+    await Pipeline(MOCK_PROJECT).run_pipeline()
+    run = PipelineRun(MOCK_PROJECT)
+
+    tables = await Pipeline(MOCK_PROJECT).run_pipeline(run=run)
+
+    assert not [event for event in run.get_events() if event["type"] == "action_done"], "The preview run should resume from its checkpoint"
+    assert len(tables["random"].index) == 10
+
+def test_pipeline_run_id_is_validated(temp_project_dir_fixture):
+    with pytest.raises(ValueError):
+        PipelineRun(MOCK_PROJECT, "../../pipeline")
+
+    assert PipelineRun(MOCK_PROJECT, PipelineRun(MOCK_PROJECT).run_id).run_id
+
+@pytest.mark.asyncio
+async def test_run_pipeline_cancelled(temp_project_dir_fixture):
+    pipeline = Pipeline(MOCK_PROJECT)
+    run = PipelineRun(MOCK_PROJECT)
+    run.cancel()
+
+    with pytest.raises(PipelineRunCancelled):
+        await pipeline.run_pipeline(run=run)
+
+    assert not [event for event in run.get_events() if event["type"] == "action_done"], "No action should be executed"
+
+@pytest.mark.asyncio
+async def test_run_pipeline_profiles_actions(temp_project_dir_fixture):
+    await Pipeline(MOCK_PROJECT).run_pipeline()
+
+    profile = Pipeline(MOCK_PROJECT).actions[2].profile
+    assert profile is not None, "The profile should be saved with the pipeline"
+    assert (profile["rows_in"], profile["rows_out"]) == (100, 100), "Profile should contain the number of rows"
+    assert profile["cols_out"] == profile["cols_in"] + 1, "Profile should contain the number of columns"
+    assert profile["wall_time"] >= 0 and profile["cpu_time"] >= 0
+    assert profile["memory_peak"] is None, "Memory should only be traced with the profile_memory setting"
+
+@pytest.mark.asyncio
+async def test_run_pipeline_profiles_memory(temp_project_dir_fixture):
+    Project.instantiate_from_dir(MOCK_PROJECT).update_settings({"misc": json.dumps({"profile_memory": True, "parallel_workers": 1})})
+
+    await Pipeline(MOCK_PROJECT).run_pipeline()
+
+    assert all(pipeline_action.profile["memory_peak"] >= 0 for pipeline_action in Pipeline(MOCK_PROJECT).actions)
+    assert not tracemalloc.is_tracing(), "Tracing should be stopped after the run"
+
+@pytest.mark.asyncio
+async def test_run_pipeline_keeps_edits_made_during_run(temp_project_dir_fixture):
+    pipeline = Pipeline(MOCK_PROJECT)
+    execute = AddColumn.execute
+    async def execute_and_edit(action, tables):
+        Pipeline(MOCK_PROJECT).add_action(DropColumn({"table_name": "ordered", "col_name": "mock_name", "col_idx": "mock_name"}))
+        return await execute(action, tables)
+
+    with patch.object(AddColumn, "execute", execute_and_edit):
+        await pipeline.run_pipeline()
+
+    actions = Pipeline(MOCK_PROJECT).actions
+    assert len(actions) == 4, "The action added during the run should be kept"
+    assert actions[2].profile is not None, "The profiles of the run should be saved"
+
+def _add_filters(pipeline):
+    pipeline.add_action(KeepRow({"table_name": "random", "keep_domain": "price > 1.5"}))
+    pipeline.add_action(DeleteRow({"table_name": "random", "delete_domain": "name.str.startswith('N', na=False)"}))
+    pipeline.add_action(RemoveUnderOver({"table_name": "random", "col_name": "reference", "col_idx": "reference",
+                                         "lower_bound": "1000", "upper_bound": "8000"}))
+    pipeline.add_action(KeepRow({"table_name": "random", "keep_domain": "price < price.mean()"}))
+
+def test_get_execution_plan_fuses_filters(temp_project_dir_fixture):
+    pipeline = Pipeline(MOCK_PROJECT)
+    _add_filters(pipeline)
+
+    plan = pipeline.get_execution_plan()
+
+    assert [step["indexes"] for step in plan] == [[0], [1], [2], [3, 4, 5], [6]], \
+        "Consecutive row by row filters on the same table should be fused (not the ones using aggregations)"
+
+@pytest.mark.asyncio
+async def test_run_pipeline_fused_filters(temp_project_dir_fixture):
+    pipeline = Pipeline(MOCK_PROJECT)
+    _add_filters(pipeline)
+    tables = {}
+    for pipeline_action in pipeline.actions:
+        await pipeline_action.action.execute(tables)
+
+    fused_tables = await pipeline.run_pipeline()
+
+    pd.testing.assert_frame_equal(fused_tables["random"], tables["random"])
+    assert Pipeline(MOCK_PROJECT).actions[4].profile["fused"] == 3
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("flags", [
+    pd.Series([True, None, False, True], dtype="boolean"),
+    pd.Series([True, np.nan, False, True], dtype=object),
+])
+async def test_fused_filters_missing_mask_values(flags):
+    actions = [KeepRow({"table_name": "t", "keep_domain": "value > 0"}), KeepRow({"table_name": "t", "keep_domain": "flag"})]
+    results = []
+    for execute in [FusedFilters(actions).execute] + [lambda tables: _execute_one_by_one(actions, tables)]:
+        try:
+            results.append((await execute({"t": pd.DataFrame({"value": [1, 2, 3, 0], "flag": flags})}))["t"])
+        except Exception as e:
+            results.append(type(e))
+
+    if isinstance(results[1], pd.DataFrame):
+        pd.testing.assert_frame_equal(results[0], results[1])
+    else:
+        assert results[0] == results[1], "A mask with missing values should behave the same fused or not"
+
+async def _execute_one_by_one(actions, tables):
+    for action in actions:
+        await action.execute(tables)
+    return tables
+
+@pytest.mark.asyncio
+async def test_run_pipeline_lazy_mode(temp_project_dir_fixture):
+    pipeline = Pipeline(MOCK_PROJECT)
+    pipeline.add_action(KeepRow({"table_name": "ordered", "keep_domain": "mock_price > 10"}))
+    pipeline.add_action(GroupBy({"table_name": "random", "groupby": "name", "agg": "{'price': 'sum'}"}))
+    eager_tables = await pipeline.run_pipeline()
+    Project.instantiate_from_dir(MOCK_PROJECT).update_settings({"misc": json.dumps({"lazy_mode": True})})
+
+    plan = pipeline.get_execution_plan()
+    lazy_tables = await pipeline.run_pipeline()
+
+    assert plan[0]["indexes"] == [0, 3], "The filter should be pushed down into the table creation"
+    assert "with columns ['name', 'price']" in plan[1]["description"], "Only the grouped columns should be loaded"
+    for name, table in eager_tables.items():
+        pd.testing.assert_frame_equal(table, lazy_tables[name])
+
+@pytest.mark.asyncio
+async def test_run_pipeline_preview(temp_project_dir_fixture):
+    pipeline = Pipeline(MOCK_PROJECT)
+    Project.instantiate_from_dir(MOCK_PROJECT).update_settings({"misc": json.dumps({"preview_rows": 10})})
+
+    preview_tables = await pipeline.run_pipeline()
+    full_tables = await pipeline.run_pipeline(full_run=True)
+
+    assert all(len(table.index) == 10 for table in preview_tables.values()), "Preview should run on samples of the sources"
+    assert all(len(table.index) == 100 for table in full_tables.values()), "Full run should use all the data"
+
+@pytest.mark.asyncio
+async def test_run_pipeline_chunked(temp_project_dir_fixture):
+    for source in Project.instantiate_from_dir(MOCK_PROJECT).get_sources():
+        source._create_pickle_file(os.path.join(source.path, "data.csv"))  # Same pandas version for both files
+    pipeline = Pipeline(MOCK_PROJECT)
+    _add_filters(pipeline)
+    pipeline.add_action(FormatString({"table_name": "random", "col_name": "name", "col_idx": "name", "operation": "upper"}))
+    eager_tables = await pipeline.run_pipeline()
+    Project.instantiate_from_dir(MOCK_PROJECT).update_settings({"misc": json.dumps({"chunk_rows": 30})})
+
+    plan = pipeline.get_execution_plan()
+    chunked_tables = await pipeline.run_pipeline()
+
+    assert [step["indexes"] for step in plan] == [[0], [1, 2, 3, 4, 5], [6], [7]], \
+        "Row local actions should be streamed with the table creation, until the first one using the whole table"
+    assert "4 chunks" in Pipeline(MOCK_PROJECT).actions[1].profile["engine"]
+    for name, table in eager_tables.items():
+        pd.testing.assert_frame_equal(table, chunked_tables[name])
+
+@pytest.mark.asyncio
+async def test_run_pipeline_memory_budget(temp_project_dir_fixture):
+    pipeline = Pipeline(MOCK_PROJECT)
+    pipeline.add_action(GroupBy({"table_name": "random", "groupby": "name", "agg": "{'price': 'sum'}"}))
+    pipeline.add_action(KeepRow({"table_name": "ordered", "keep_domain": "mock_price > 10"}))
+    tables = await pipeline.run_pipeline()
+    Project.instantiate_from_dir(MOCK_PROJECT).update_settings({"misc": json.dumps({"memory_budget_mb": 0.001, "profile_memory": True})})
+    run = PipelineRun(MOCK_PROJECT)
+
+    budget_tables = await Pipeline(MOCK_PROJECT).run_pipeline(run=run)
+
+    stats = [event for event in run.get_events() if event["type"] == "pipeline_done"][0]
+    assert stats["spilled"] > 0, "Tables should be spilled to disk over the memory budget"
+    assert stats["memory_peak"] > 0 and stats["tables_peak"] > 0, "The peak memory of the run should be reported"
+    assert tables.keys() == budget_tables.keys(), "Spilled tables should be reloaded at the end of the run"
+    for name, table in tables.items():
+        pd.testing.assert_frame_equal(table, budget_tables[name])
+
+@pytest.mark.asyncio
+async def test_run_pipeline_skips_unused_actions(temp_project_dir_fixture):
+    pipeline = Pipeline(MOCK_PROJECT)
+    pipeline.add_action(AddColumn({"table_name": "random", "col_name": "tmp", "col_value": "c['price'] * 2"}))
+    pipeline.add_action(KeepRow({"table_name": "random", "keep_domain": "price > 1"}))
+    pipeline.add_action(DropColumn({"table_name": "random", "col_name": "tmp", "col_idx": "tmp"}))
+    pipeline.add_action(CreateTable({"table_name": "scratch", "source_creation_type": "other_tables", "table_df": "ordered"}))
+    pipeline.add_action(CreateTable({"table_name": "scratch", "source_creation_type": "other_tables", "table_df": "random"}))
+    tables = {}
+    for pipeline_action in pipeline.actions:
+        await pipeline_action.action.execute(tables)
+
+    plan = pipeline.get_execution_plan()
+    optimized_tables = await pipeline.run_pipeline()
+
+    executed_indexes = [idx for step in plan for idx in step["indexes"]]
+    assert 3 not in executed_indexes and 6 not in executed_indexes, "Actions whose result is never used should be skipped"
+    assert [pipeline_action.skipped for pipeline_action in Pipeline(MOCK_PROJECT).actions] == [False] * 3 + [True, False, False, True, False]
+    assert tables.keys() == optimized_tables.keys()
+    for name, table in tables.items():
+        pd.testing.assert_frame_equal(table, optimized_tables[name])
+
+@pytest.mark.asyncio
+async def test_run_pipeline_lazy_mode_dropped_columns(temp_project_dir_fixture):
+    pipeline = Pipeline(MOCK_PROJECT)
+    pipeline.add_action(DropColumn({"table_name": "random", "col_name": "reference", "col_idx": "reference"}))
+    eager_tables = await pipeline.run_pipeline()
+    Project.instantiate_from_dir(MOCK_PROJECT).update_settings({"misc": json.dumps({"lazy_mode": True})})
+
+    plan = pipeline.get_execution_plan()
+    lazy_tables = await pipeline.run_pipeline()
+
+    assert "without columns ['reference']" in plan[1]["description"], "Dropped columns should not be loaded"
+    for name, table in eager_tables.items():
+        pd.testing.assert_frame_equal(table, lazy_tables[name])
@@ -0,0 +1,73 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from app.pipelines.models.actions import DropDuplicates, FormatString, GroupBy, MergeTables, ReplaceInCell
+from app.pipelines.models.polars_backend import POLARS_AVAILABLE
+
+pytestmark = pytest.mark.skipif(not POLARS_AVAILABLE, reason="polars is not installed")
+
+
+def _get_tables():
+    return {
+        "table1": pd.DataFrame({
+            "key": ["b", "a", None, "b", "c", "a"],
+            "value": [1, 2, 3, 4, 5, 2],
+            "price": [1.5, np.nan, 3.0, 4.5, 5.0, np.nan],
+            "label": [" x ", "y", "z ", None, " w", "y"],
+        }, index=[10, 11, 12, 13, 14, 15]),
+        "table2": pd.DataFrame({"key": ["a", "b", "b", None], "price": [10, 20, 30, 40]}),
+    }
+
+async def _execute_with_backends(action_class, form_data):
+    results = {}
+    for backend in ("pandas", "polars"):
+        action = action_class(form_data)
+        action.backend = backend
+        tables = _get_tables()
+        await action.execute(tables)
+        results[backend] = (tables[form_data["table_name"]], action.engine)
+    return results
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("action_class, form_data", [
+    (GroupBy, {"table_name": "table1", "groupby": "key", "agg": "{'value': 'sum', 'price': 'mean', 'label': 'count'}"}),
+    (GroupBy, {"table_name": "table1", "groupby": "['key', 'value']", "agg": "{'price': 'max'}"}),
+    (GroupBy, {"table_name": "table1", "groupby": "key", "agg": "{'price': 'nunique', 'label': 'nunique'}"}),
+    (MergeTables, {"table_name": "table1", "table2": "table2", "on": "key", "how": "inner"}),
+    (MergeTables, {"table_name": "table1", "table2": "table2", "on": "key", "how": "left"}),
+    (DropDuplicates, {"table_name": "table1", "subset": "['key', 'value']", "keep": "first"}),
+    (DropDuplicates, {"table_name": "table1", "subset": "['key']", "keep": "last"}),
+    (DropDuplicates, {"table_name": "table1", "subset": "[]", "keep": "false"}),
+    (FormatString, {"table_name": "table1", "col_name": "label", "col_idx": "label", "operation": "strip"}),
+    (ReplaceInCell, {"table_name": "table1", "col_name": "label", "col_idx": "label", "action": "regex",
+                     "regex": "[xy]", "replacement": "-"}),
+])
+async def test_polars_backend_same_result(temp_project_dir_fixture, action_class, form_data):
+    results = await _execute_with_backends(action_class, form_data)
+
+    assert results["polars"][1] == "polars", "The polars backend should be used"
+    pd.testing.assert_frame_equal(results["pandas"][0], results["polars"][0])
+
+@pytest.mark.asyncio
+async def test_polars_backend_fallback(temp_project_dir_fixture):
+    results = await _execute_with_backends(MergeTables, {"table_name": "table1", "table2": "table2", "on": "key", "how": "outer"})
+
+    assert results["polars"][1] is None, "Unsupported operations should be executed by pandas"
+    pd.testing.assert_frame_equal(results["pandas"][0], results["polars"][0])
+
+@pytest.mark.asyncio
+async def test_polars_backend_group_by_strings(temp_project_dir_fixture):
+    results = await _execute_with_backends(GroupBy, {"table_name": "table1", "groupby": "key", "agg": "{'label': 'sum'}"})
+
+    assert results["polars"][1] is None, "Aggregations other than count and nunique on strings should be executed by pandas"
+    pd.testing.assert_frame_equal(results["pandas"][0], results["polars"][0])
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", ["pandas", "polars"])
+async def test_polars_backend_group_by_mean_of_strings(temp_project_dir_fixture, backend):
+    action = GroupBy({"table_name": "table1", "groupby": "key", "agg": "{'label': 'mean'}"})
+    action.backend = backend
+
+    with pytest.raises(TypeError):
+        await action.execute(_get_tables())
@@ -0,0 +1,55 @@
+import re
+import numpy as np
+import pandas as pd
+
+from app.tables.models.table_html import iter_table_html, render_table_html
+
+
+def test_render_table_html():
+    df = pd.DataFrame({
+        "int": [1, 2],
+        "float": [2.0, np.nan],
+        "text": ["<b>", None],
+        "date": pd.to_datetime(["2020-01-01", None]),
+        'quote"': [True, False],
+    })
+
+    table_html = render_table_html(df)
+
+    assert table_html.startswith('<table border="1" class="dataframe df-table">')
+    assert '<th data-columnidx="int">int</th>' in table_html
+    assert '<th data-columnidx="quote&quot;">quote"</th>' in table_html
+    assert "<tr><td>1</td><td>2.0</td><td>&lt;b&gt;</td><td>2020-01-01</td><td>True</td></tr>" in table_html
+    assert "<tr><td>2</td><td>NaN</td><td>" in table_html
+
+def test_render_floats_as_to_html():
+    df = pd.DataFrame({
+        "large": [123456.789, 1999999.99, np.nan],
+        "small": [1e-10, 2.5, 3.0],
+        "digits": [1 / 3, 0.1 + 0.2, -5.5],
+        "huge": [1e20, 2.0, np.nan],
+        "nullable": pd.array([1.25, None, 3.0], dtype="Float64"),
+    })
+
+    cells = re.findall(r"<td>(.*?)</td>", render_table_html(df))
+
+    assert cells == re.findall(r"<td>(.*?)</td>", df.to_html(index=False))
+    assert cells[:2] == ["123456.789", "1.000000e-10"]
+    assert "1999999.990" in cells
+
+def test_render_multiindex_columns():
+    df = pd.DataFrame([[1, 2, 3]], columns=pd.MultiIndex.from_tuples([("a", "x"), ("a", "y"), ("b", "x")]))
+
+    table_html = render_table_html(df)
+
+    assert '<tr><th colspan="2" halign="left">a</th><th>b</th></tr>' in table_html
+    assert """<th data-columnidx="(&#x27;a&#x27;, &#x27;y&#x27;)">y</th>""" in table_html
+
+def test_iter_table_html_by_chunks():
+    df = pd.DataFrame({"a": np.arange(25) / 3, "b": [str(idx) for idx in range(25)]})
+
+    chunks = list(iter_table_html(df, rows_per_chunk=10))
+
+    assert len(chunks) == 3 + 3 + 1
+    assert "".join(chunks) == render_table_html(df)
+    assert "".join(chunks).count("<tr><td>") == 25
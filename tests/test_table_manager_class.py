@@ -1,5 +1,10 @@
+import asyncio
+import os
 import pytest
+import socket
 
+from app.pipelines.models.pipeline import Pipeline
+from app.pipelines.models.pipeline_pool import PipelinePool
 from app.tables.models.table_manager import TableManager
 from tests import MOCK_PROJECT
 
@@ -62,3 +67,68 @@ async def test_get_autocomplete_data(temp_project_dir_fixture):
     assert "mock_price" in autocomplete_data["ordered"]
     assert "name" in autocomplete_data["random"]
     assert "price" in autocomplete_data["random"]
+
+@pytest.mark.asyncio
+async def test_pipeline_run_does_not_block_event_loop(temp_project_dir_fixture):
+    ticks = 0
+    async def tick():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0)
+
+    ticker = asyncio.create_task(tick())
+    await TableManager.init_from_project_dir(MOCK_PROJECT, lazy=False)
+    ticker.cancel()
+
+    assert ticks > 1, "Event loop should keep running other tasks during the pipeline run"
+
+@pytest.mark.asyncio
+async def test_concurrent_runs_are_done_once(temp_project_dir_fixture, monkeypatch):
+    run_pipeline = PipelinePool.run_pipeline
+    runs = 0
+    async def counted_run_pipeline(*args, **kwargs):
+        nonlocal runs
+        runs += 1
+        return await run_pipeline(*args, **kwargs)
+    monkeypatch.setattr(PipelinePool, "run_pipeline", counted_run_pipeline)
+
+    first, second = await asyncio.gather(
+        TableManager.init_from_project_dir(MOCK_PROJECT),
+        TableManager.init_from_project_dir(MOCK_PROJECT),
+    )
+
+    assert runs == 1
+    assert first is second
+    assert not os.path.exists(os.path.join(first.project.path, "pipeline_run.lock"))
+
+@pytest.mark.asyncio
+async def test_run_waits_for_other_worker(temp_project_dir_fixture, monkeypatch):
+    project_path = os.path.join(os.getcwd(), "_projects", MOCK_PROJECT)
+    lock_path = os.path.join(project_path, "pipeline_run.lock")
+    other_worker_tables = await Pipeline(MOCK_PROJECT).run_pipeline()
+    async def no_run_pipeline(*args, **kwargs):
+        raise AssertionError("The tables of the other worker should be reused")
+    monkeypatch.setattr(PipelinePool, "run_pipeline", no_run_pipeline)
+
+    with open(lock_path, 'w') as f:
+        f.write(f"{os.getpid()} {socket.gethostname()}")
+    async def other_worker():
+        await asyncio.sleep(0.3)
+        TableManager(other_worker_tables, MOCK_PROJECT)._save_tables()
+        os.remove(lock_path)
+
+    table_manager, _ = await asyncio.gather(TableManager.init_from_project_dir(MOCK_PROJECT), other_worker())
+
+    assert set(table_manager.tables) == set(other_worker_tables)
+
+@pytest.mark.asyncio
+async def test_stale_lock_is_ignored(temp_project_dir_fixture):
+    lock_path = os.path.join(os.getcwd(), "_projects", MOCK_PROJECT, "pipeline_run.lock")
+    with open(lock_path, 'w') as f:
+        f.write(f"999999999 {socket.gethostname()}")
+
+    table_manager = await asyncio.wait_for(TableManager.init_from_project_dir(MOCK_PROJECT), timeout=30)
+
+    assert "random" in table_manager.tables
+    assert not os.path.exists(lock_path)
@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+
+from app.main import app
+from app.pipelines.models.pipeline_pool import PipelinePool
+from app.tables.models.table_manager import TableManager
+from app.tables.models.table_rows import rows_to_json
+from tests import MOCK_PROJECT
+
+
+client = TestClient(app)
+
+
+def test_rows_to_json():
+    rows = pd.DataFrame({
+        "int": [1, 2],
+        "float": [1.5, np.nan],
+        "text": ["a", None],
+        "date": pd.to_datetime(["2020-01-01", None]),
+    })
+
+    rows_json = rows_to_json(rows, [0, 1, 2, 5])
+
+    assert [column["position"] for column in rows_json["columns"]] == [0, 1, 2, 5]
+    assert rows_json["columns"][1] == {"position": 1, "columnidx": "float", "name": "float", "dtype": "float64"}
+    assert rows_json["data"] == [[1, 2], [1.5, None], ["a", None], ["2020-01-01", None]]
+
+@pytest.mark.asyncio
+async def test_rows_endpoint(temp_project_dir_fixture):
+    table_manager = await TableManager.init_from_project_dir(MOCK_PROJECT)
+    table = table_manager.tables["random"].content
+
+    response = client.get("/tables/rows/", params={"project_dir": MOCK_PROJECT, "table_name": "random", "start": 95, "stop": 200})
+
+    assert response.status_code == 200
+    content = response.json()
+    assert (content["start"], content["stop"], content["total_len"]) == (95, 100, 100)
+    assert [column["name"] for column in content["columns"]] == list(table.columns)
+    assert content["data"][0] == table["name"].iloc[95:100].tolist()
+
+@pytest.mark.asyncio
+async def test_rows_endpoint_arrow_columns(temp_project_dir_fixture):
+    pa = pytest.importorskip("pyarrow")
+    table_manager = await TableManager.init_from_project_dir(MOCK_PROJECT)
+    table = table_manager.tables["random"].content
+
+    response = client.get("/tables/rows/", params={
+        "project_dir": MOCK_PROJECT, "table_name": "random", "start": 10, "stop": 20, "columns": "1,0", "format": "arrow"
+    })
+
+    assert response.status_code == 200
+    assert response.headers["x-total-len"] == "100"
+    rows = pa.ipc.open_stream(response.content).read_all()
+    assert rows.column_names == [table.columns[1], table.columns[0]]
+    assert rows.num_rows == 10
+
+@pytest.mark.asyncio
+async def test_rows_endpoint_errors(temp_project_dir_fixture):
+    await TableManager.init_from_project_dir(MOCK_PROJECT)
+
+    unknown_table = client.get("/tables/rows/", params={"project_dir": MOCK_PROJECT, "table_name": "unknown"})
+    invalid_columns = client.get("/tables/rows/", params={"project_dir": MOCK_PROJECT, "table_name": "random", "columns": "a"})
+
+    assert unknown_table.status_code == 404
+    assert invalid_columns.status_code == 400
+
+@pytest.mark.asyncio
+async def test_tables_page_renders_tables_on_demand(temp_project_dir_fixture):
+    response = client.get("/tables/", params={"project_dir": MOCK_PROJECT})
+
+    assert response.status_code == 200
+    assert 'id="table-html-random"' in response.text
+    assert "<td>" not in response.text, "Tables should be rendered when opened"
+    assert 'data-totallen="100"' in response.text
+
+    first_page = client.get("/tables/pager/", params={"project_dir": MOCK_PROJECT, "table_name": "random", "page": 0, "n": 10})
+    assert first_page.text.count("<tr><td>") == 10
+
+@pytest.mark.asyncio
+async def test_tables_page_lazy_shows_saved_tables(temp_project_dir_fixture):
+    await TableManager.init_from_project_dir(MOCK_PROJECT)
+
+    with patch.object(PipelinePool, "run_pipeline", side_effect=Exception("Should not be run")):
+        response = client.get("/tables/", params={"project_dir": MOCK_PROJECT, "lazy": "true"})
+
+    assert response.status_code == 200
+    assert "Should not be run" not in response.text and "random" in response.text
+
+@pytest.mark.asyncio
+async def test_rows_endpoint_returns_json_errors(temp_project_dir_fixture):
+    await TableManager.init_from_project_dir(MOCK_PROJECT)
+
+    with patch.object(TableManager, "init_from_project_dir", side_effect=Exception("Pipeline error")):
+        response = client.get("/tables/rows/", params={"project_dir": MOCK_PROJECT, "table_name": "random"})
+
+    assert response.status_code == 500
+    assert response.json() == {"message": "Pipeline error"}
@@ -0,0 +1,94 @@
+import numpy as np
+import os
+import pandas as pd
+import pytest
+
+from unittest.mock import patch
+
+from app.tables.models.table_manager import TableManager
+from app.tables.models.table_storage import TableStorage
+from tests import MOCK_PROJECT
+
+
+def test_save_and_load(tmp_path):
+    pytest.importorskip("pyarrow")
+    storage = TableStorage(str(tmp_path))
+    tables = {
+        "filtered": pd.DataFrame({"a": [1, 2, 3], "b": pd.Categorical(["x", "y", "x"])}).iloc[[0, 2]],
+        "mixed": pd.DataFrame({"m": [1, "a"]}),
+        "objects": pd.DataFrame({"o": pd.Series(["a", np.nan], dtype=object), "n": [1, 2]}),
+        "nullable_objects": pd.DataFrame({"o": pd.Series([1, None, 3], dtype=object)}),
+        "intervals": pd.DataFrame({"i": pd.cut([1, 5, 9], 3)}),
+        "periods": pd.DataFrame({"p": pd.period_range("2020", periods=3, freq="M")}),
+    }
+
+    catalog = storage.save(tables, preview={"rows": 3, "sampling": "head"})
+
+    assert storage.read_catalog() == catalog
+    assert catalog["preview"] == {"rows": 3, "sampling": "head"}
+    assert catalog["tables"]["filtered"]["rows"] == 2
+    assert catalog["tables"]["filtered"]["columns"] == ["a", "b"]
+    assert catalog["tables"]["filtered"]["file"].endswith(".arrow")
+    assert catalog["tables"]["objects"]["file"].endswith(".arrow")
+    for table_name in ["mixed", "nullable_objects", "intervals", "periods"]:
+        assert catalog["tables"][table_name]["file"].endswith(".pkl"), "Tables not read back the same from Arrow should be pickled"
+    for table_name, table in tables.items():
+        pd.testing.assert_frame_equal(storage.load_table(catalog["tables"][table_name]), table)
+        pd.testing.assert_frame_equal(storage.read_rows(catalog["tables"][table_name], 0, 1, [0]), table.iloc[:1, [0]])
+
+def test_save_keeps_previous_files_until_next_save(tmp_path):
+    storage = TableStorage(str(tmp_path))
+    first_catalog = storage.save({"first": pd.DataFrame({"a": [1]})})
+
+    second_catalog = storage.save({"second": pd.DataFrame({"a": [2]})})
+
+    pd.testing.assert_frame_equal(storage.read_rows(first_catalog["tables"]["first"], 0, 1), pd.DataFrame({"a": [1]}))
+    third_catalog = storage.save({"third": pd.DataFrame({"a": [3]})})
+    assert sorted(os.listdir(storage.path)) == sorted([
+        "catalog.json", second_catalog["tables"]["second"]["file"], third_catalog["tables"]["third"]["file"]
+    ])
+
+def test_read_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(TableStorage, "BATCH_ROWS", 4)
+    storage = TableStorage(str(tmp_path))
+    table = pd.DataFrame({"a": range(10), "b": [str(idx) for idx in range(10)]})
+    catalog = storage.save({"table": table})
+
+    for start, stop in [(0, 3), (2, 9), (4, 8), (8, 20), (12, 15)]:
+        rows = storage.read_rows(catalog["tables"]["table"], start, stop)
+        pd.testing.assert_frame_equal(rows.reset_index(drop=True), table.iloc[start:stop].reset_index(drop=True))
+
+@pytest.mark.asyncio
+async def test_pager_does_not_load_table(temp_project_dir_fixture):
+    pytest.importorskip("pyarrow")
+    table_manager = await TableManager.init_from_project_dir(MOCK_PROJECT)
+    lazy_table_manager = TableManager._init_from_storage(MOCK_PROJECT, TableStorage(table_manager.project.path))
+
+    with patch.object(TableStorage, "load_table", side_effect=Exception("Should not be loaded")):
+        page_html = lazy_table_manager.tables["random"].to_html(10, page=2, n=10)
+
+    assert page_html == table_manager.tables["random"].to_html(10, page=2, n=10)
+
+@pytest.mark.asyncio
+async def test_lazy_table_manager_loads_only_used_tables(temp_project_dir_fixture):
+    table_manager = await TableManager.init_from_project_dir(MOCK_PROJECT)
+
+    load_table = TableStorage.load_table
+    with patch.object(TableStorage, "load_table", side_effect=load_table, autospec=True) as load_table:
+        lazy_table_manager = TableManager._init_from_storage(MOCK_PROJECT, TableStorage(table_manager.project.path))
+        autocomplete_data = lazy_table_manager.get_autocomplete_data()
+        content = lazy_table_manager.tables["random"].content
+
+    assert load_table.call_count == 1
+    assert autocomplete_data == table_manager.get_autocomplete_data()
+    pd.testing.assert_frame_equal(content, table_manager.tables["random"].content)
+
+@pytest.mark.asyncio
+async def test_first_page_is_rendered_once(temp_project_dir_fixture):
+    table_manager = await TableManager.init_from_project_dir(MOCK_PROJECT)
+    table = table_manager.tables["random"]
+    first_page = "".join(table.iter_html(10, page=0, n=10))
+
+    with patch("app.tables.models.table.render_table_html", side_effect=Exception("Should not be rendered")):
+        assert "".join(table.iter_html(10, page=0, n=10)) == first_page
+    assert first_page == table.to_html(10)